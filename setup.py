@@ -46,25 +46,32 @@ setuptools.setup(
     license=LICENSE,
     classifiers=[
         "Development Status :: 4 - Beta",
-        "Programming Language :: Python :: 3.6",
+        "Programming Language :: Python :: 3.7",
         "License :: OSI Approved :: MIT License",
     ],
+    python_requires=">=3.7",
     keywords=["lsst", "rubinobservatory", "argo", "workflow", "jupyter"],
     install_requires=[
         "requests>=2,<3",
         "semver>=2,<3",
         "rubin_jupyter_utils.hub>=0.33.0,<1.0.0",
-        "kubernetes>=11",
+        "kubernetes>=12",
         "wsgiserver>=1.3,<2",
-        "falcon>=2,<3",
+        "falcon>=3,<4",
         "argo-workflows>=3,<4",
         "pyyaml>=5,<6",
+        "prometheus_client>=0.8",
     ],
+    extras_require={
+        "asgi": ["uvicorn>=0.14"],
+        "async": ["httpx>=0.18"],
+    },
     entry_points={
         "console_scripts": [
             "workflow-rest = wfdispatcher.server.standalone:standalone",
             "gen_data = wfdispatcher.helpers.standalone:standalone",
             "workflow-api-client = wfdispatcher.client.standalone:standalone",
+            "workflow-bench = wfdispatcher.benchmark.standalone:standalone",
         ],
     },
 )
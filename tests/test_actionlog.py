@@ -0,0 +1,55 @@
+import eliot
+import pytest
+from wfdispatcher.objects.actionlog import POLICY, log_call, start_action
+
+
+@pytest.fixture
+def messages():
+    logged = []
+    eliot.add_destinations(logged.append)
+    yield logged
+    eliot.remove_destination(logged.append)
+    POLICY.configure()
+
+
+@log_call(action_type="outer")
+def outer():
+    with start_action(action_type="inner"):
+        with start_action(action_type="innermost"):
+            pass
+
+
+def run_tasks(messages, **config):
+    """Run 50 'outer' tasks under the given policy and return, for each
+    action type, the number of actions started, and the number of tasks
+    logged.
+    """
+    POLICY.configure(**config)
+    for _ in range(50):
+        outer()
+    counts = {"outer": 0, "inner": 0, "innermost": 0}
+    tasks = set()
+    for msg in messages:
+        if msg.get("action_status") == "started":
+            counts[msg["action_type"]] += 1
+            tasks.add(msg["task_uuid"])
+    return counts, len(tasks)
+
+
+def test_children_follow_top_level_decision(messages):
+    counts, tasks = run_tasks(messages, sample_rate=0.5)
+    assert 0 < counts["outer"] < 50
+    assert counts["inner"] == counts["outer"]
+    assert counts["innermost"] == counts["outer"]
+    assert tasks == counts["outer"]
+
+
+def test_dropped_top_level_drops_task(messages):
+    counts, tasks = run_tasks(messages, rates={"outer": 0})
+    assert counts == {"outer": 0, "inner": 0, "innermost": 0}
+
+
+def test_type_off_within_logged_task(messages):
+    counts, tasks = run_tasks(messages, rates={"inner": 0})
+    assert counts == {"outer": 50, "inner": 0, "innermost": 50}
+    assert tasks == 50
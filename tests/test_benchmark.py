@@ -0,0 +1,25 @@
+import json
+import sys
+import pytest
+from wfdispatcher.benchmark.benchmark import Benchmark, OPERATIONS
+from wfdispatcher.benchmark.standalone import standalone
+
+
+@pytest.mark.parametrize("extra", [[], ["--workflow-cache"]])
+def test_every_operation_runs_cleanly(monkeypatch, capsys, extra):
+    argv = ["workflow-bench", "-n", "4", "-c", "2", "--workflows", "4"]
+    monkeypatch.setattr(sys, "argv", argv + ["--json"] + extra)
+    standalone()
+    results = json.loads(capsys.readouterr().out)
+    assert sorted(results) == sorted(OPERATIONS)
+    for op, res in results.items():
+        assert res["requests"] == 4, op
+        assert res["errors"] == 0, op
+
+
+def test_provisioning_uses_fake_api():
+    bench = Benchmark(operations=["new"], requests=2, concurrency=1)
+    results = bench.run()
+    assert results["new"]["errors"] == 0
+    assert bench.fake.calls.get("POST namespaces") == 1
+    assert bench.fake.calls.get("POST workflows") == 2
@@ -0,0 +1,133 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import falcon.testing
+import pytest
+from kubernetes.client import V1ConfigMap, V1ObjectMeta
+from kubernetes.client.rest import ApiException
+from rubin_jupyter_utils.hub import Loggable
+from wfdispatcher.objects.configmapcache import (
+    CM_USED_ANNOTATION,
+    ConfigMapCache,
+)
+from wfdispatcher.objects.workflowmanager import RubinWorkflowManager
+
+NAMESPACE = "user-test"
+CM_NAME = "command-abc"
+
+
+class FakeCoreApi(object):
+    """Hold configmaps by name, and record every call made."""
+
+    def __init__(self):
+        self.configmaps = {}
+        self.calls = []
+
+    def create_namespaced_config_map(self, namespace, body):
+        self.calls.append("create")
+        if body.metadata.name in self.configmaps:
+            raise ApiException(status=409, reason="AlreadyExists")
+        self.configmaps[body.metadata.name] = body
+
+    def patch_namespaced_config_map(self, name, namespace, body):
+        self.calls.append("patch")
+        if name not in self.configmaps:
+            raise ApiException(status=404, reason="NotFound")
+        md = self.configmaps[name].metadata
+        md.annotations = body["metadata"]["annotations"]
+
+    def list_config_map_for_all_namespaces(self, label_selector=None):
+        return SimpleNamespace(items=list(self.configmaps.values()))
+
+    def delete_namespaced_config_map(self, name, namespace):
+        self.calls.append("delete")
+        del self.configmaps[name]
+
+
+@pytest.fixture
+def core_api():
+    return FakeCoreApi()
+
+
+@pytest.fixture
+def cm_cache(core_api):
+    pool = SimpleNamespace(get_core_api=lambda: core_api)
+    return ConfigMapCache(parent=Loggable(), client_pool=pool, ttl=60)
+
+
+@pytest.fixture
+def manager(core_api, cm_cache):
+    req = falcon.testing.create_req()
+    req.context.user = SimpleNamespace(
+        name="test", escaped_name="test", namespace=NAMESPACE
+    )
+    wm = RubinWorkflowManager(
+        req=req,
+        client_pool=SimpleNamespace(get_core_api=lambda: core_api),
+        ns_cache=SimpleNamespace(),
+        config_snapshot=SimpleNamespace(generation=0),
+        configmap_cache=cm_cache,
+    )
+    wm.cfg_map = V1ConfigMap(metadata=V1ObjectMeta(name=CM_NAME))
+    return wm
+
+
+def test_known_configmap_is_not_recreated(manager, core_api):
+    manager.create_configmap()
+    manager.create_configmap()
+    assert core_api.calls == ["create"]
+
+
+def test_expired_entry_stamps_existing_configmap(manager, core_api, cm_cache):
+    manager.create_configmap()
+    cm_cache._entries[NAMESPACE][CM_NAME] -= cm_cache.ttl + 1
+    manager.create_configmap()
+    assert core_api.calls == ["create", "create", "patch"]
+    anno = core_api.configmaps[CM_NAME].metadata.annotations
+    assert CM_USED_ANNOTATION in anno
+    assert cm_cache.known(NAMESPACE, CM_NAME)
+
+
+def test_configmap_collected_after_409_is_recreated(manager, core_api):
+    def collected_meanwhile(name, namespace, body):
+        core_api.calls.append("patch")
+        core_api.configmaps.clear()
+        raise ApiException(status=404, reason="NotFound")
+
+    core_api.configmaps[CM_NAME] = manager.cfg_map
+    core_api.patch_namespaced_config_map = collected_meanwhile
+    manager.create_configmap()
+    assert core_api.calls == ["create", "patch", "create"]
+    assert CM_NAME in core_api.configmaps
+
+
+def test_knowing_does_not_extend_ttl(cm_cache):
+    cm_cache.mark(NAMESPACE, CM_NAME)
+    marked = cm_cache._entries[NAMESPACE][CM_NAME]
+    assert cm_cache.known(NAMESPACE, CM_NAME)
+    assert cm_cache._entries[NAMESPACE][CM_NAME] == marked
+
+
+def test_ttl_must_be_less_than_gc_min_age(core_api):
+    pool = SimpleNamespace(get_core_api=lambda: core_api)
+    with pytest.raises(ValueError):
+        ConfigMapCache(
+            parent=Loggable(), client_pool=pool, ttl=3600, gc_min_age=3600
+        )
+
+
+def test_collect_honors_used_annotation(cm_cache, core_api, monkeypatch):
+    old = datetime.fromtimestamp(time.time() - 7200, tz=timezone.utc)
+    for name, used in [("stale", None), ("reused", time.time())]:
+        anno = {CM_USED_ANNOTATION: str(int(used))} if used else None
+        core_api.configmaps[name] = V1ConfigMap(
+            metadata=V1ObjectMeta(
+                name=name,
+                namespace=NAMESPACE,
+                creation_timestamp=old,
+                annotations=anno,
+            )
+        )
+    monkeypatch.setattr(cm_cache, "_referenced", lambda ns: set())
+    assert cm_cache.collect() == 1
+    assert sorted(core_api.configmaps) == ["reused"]
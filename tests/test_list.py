@@ -0,0 +1,128 @@
+import json
+from types import SimpleNamespace
+import falcon
+import falcon.testing
+import pytest
+from rubin_jupyter_utils.hub import Loggable
+from wfdispatcher.objects.workflowmanager import (
+    PHASE_LABEL,
+    RubinWorkflowManager,
+)
+from wfdispatcher.server.list import List
+
+NAMESPACE = "user-test"
+
+
+def make_wf(name, phase):
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": NAMESPACE,
+            "labels": {PHASE_LABEL: phase},
+        },
+        "status": {"phase": phase},
+    }
+
+
+WORKFLOWS = [
+    make_wf("a", "Running"),
+    make_wf("b", "Succeeded"),
+    make_wf("c", "Failed"),
+]
+
+
+class FakeCustomApi(object):
+    """Serve WORKFLOWS, honoring a 'phase in (...)' label selector."""
+
+    def __init__(self):
+        self.selectors = []
+
+    def list_namespaced_custom_object(self, *args, **kwargs):
+        selector = kwargs.get("label_selector")
+        self.selectors.append(selector)
+        items = WORKFLOWS
+        if selector:
+            phases = selector.split("(")[1].rstrip(")").split(",")
+            items = [x for x in items if x["status"]["phase"] in phases]
+        body = {"metadata": {"resourceVersion": "7"}, "items": items}
+        return SimpleNamespace(data=json.dumps(body).encode("utf-8"))
+
+
+class FakeWorkflowCache(object):
+    synced = True
+    resource_version = "7"
+
+    def snapshot(self, namespace):
+        return self.resource_version, list(WORKFLOWS)
+
+
+class FakeNamespaceCache(object):
+    def exists(self, namespace):
+        return True
+
+
+class FakeParent(Loggable):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.custom_api = FakeCustomApi()
+        self.client_pool = SimpleNamespace(
+            get_custom_api=lambda: self.custom_api
+        )
+
+    def make_workflow_manager(self, req):
+        return RubinWorkflowManager(
+            req=req,
+            client_pool=self.client_pool,
+            wf_cache=FakeWorkflowCache(),
+            ns_cache=FakeNamespaceCache(),
+            config_snapshot=SimpleNamespace(generation=0),
+        )
+
+
+class FakeAuth(object):
+    def process_request(self, req, resp):
+        req.context.user = SimpleNamespace(
+            name="test", escaped_name="test", namespace=NAMESPACE
+        )
+
+
+@pytest.fixture
+def parent():
+    return FakeParent()
+
+
+@pytest.fixture
+def client(parent):
+    app = falcon.App(middleware=[FakeAuth()])
+    app.add_route("/", List(parent=parent))
+    return falcon.testing.TestClient(app)
+
+
+@pytest.mark.parametrize("consistency", ["cached", "live"])
+@pytest.mark.parametrize(
+    "query",
+    [
+        "phase=Running,Succeeded&fields=name,phase",
+        "phase=Running&phase=Succeeded&fields=name&fields=phase",
+    ],
+)
+def test_list_splits_csv_params(client, parent, consistency, query):
+    result = client.simulate_get(
+        "/", query_string="{}&consistency={}".format(query, consistency)
+    )
+    assert result.status_code == 200
+    assert sorted(result.json, key=lambda x: x["name"]) == [
+        {"name": "a", "phase": "Running"},
+        {"name": "b", "phase": "Succeeded"},
+    ]
+    if consistency == "live":
+        assert parent.custom_api.selectors == [
+            "{} in (Running,Succeeded)".format(PHASE_LABEL)
+        ]
+    else:
+        assert parent.custom_api.selectors == []
+
+
+def test_list_rejects_unknown_fields(client):
+    result = client.simulate_get("/", query_string="fields=name,bogus")
+    assert result.status_code == 400
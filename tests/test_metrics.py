@@ -0,0 +1,48 @@
+import falcon
+import falcon.testing
+import pytest
+from prometheus_client import REGISTRY
+from wfdispatcher.server.metrics import MetricsMiddleware
+
+IN_FLIGHT = "wfdispatcher_requests_in_flight"
+LATENCY_COUNT = "wfdispatcher_request_seconds_count"
+ROUTE = {"route": "/stream", "method": "GET"}
+
+
+class Stream(object):
+    """Stream a few lines, noting how many requests were in flight while
+    each was sent.
+    """
+
+    def __init__(self):
+        self.seen = []
+
+    def on_get(self, req, resp):
+        resp.stream = self.lines()
+
+    def lines(self):
+        for idx in range(3):
+            self.seen.append(REGISTRY.get_sample_value(IN_FLIGHT))
+            yield "line {}\n".format(idx).encode("utf-8")
+
+
+@pytest.fixture
+def stream():
+    return Stream()
+
+
+@pytest.fixture
+def client(stream):
+    app = falcon.App(middleware=[MetricsMiddleware()])
+    app.add_route("/stream", stream)
+    return falcon.testing.TestClient(app)
+
+
+def test_stream_stays_in_flight_until_sent(client, stream):
+    before = REGISTRY.get_sample_value(IN_FLIGHT)
+    count = REGISTRY.get_sample_value(LATENCY_COUNT, ROUTE) or 0
+    result = client.simulate_get("/stream")
+    assert result.text == "line 0\nline 1\nline 2\n"
+    assert stream.seen == [before + 1] * 3
+    assert REGISTRY.get_sample_value(IN_FLIGHT) == before
+    assert REGISTRY.get_sample_value(LATENCY_COUNT, ROUTE) == count + 1
@@ -0,0 +1,27 @@
+import json
+import pytest
+from wfdispatcher.helpers.resource_version import resource_version
+
+
+def make_wf(labels=None):
+    return {
+        "metadata": {
+            "name": "wf",
+            "labels": labels or {},
+            "resourceVersion": "42",
+        },
+        "spec": {},
+    }
+
+
+@pytest.mark.parametrize(
+    "wf", [make_wf(), make_wf(labels={"resourceVersion": "1"})]
+)
+def test_resource_version_of_raw_object(wf):
+    assert resource_version(json.dumps(wf).encode("utf-8")) == "42"
+    assert resource_version(wf) == "42"
+
+
+def test_resource_version_missing():
+    assert resource_version(b'{"metadata": {"name": "wf"}}') is None
+    assert resource_version({"metadata": {"name": "wf"}}) is None
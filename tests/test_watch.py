@@ -0,0 +1,38 @@
+import falcon.testing
+import pytest
+from rubin_jupyter_utils.hub import Loggable
+from wfdispatcher.helpers.workflow_delta import TERMINAL_PHASES
+from wfdispatcher.server.watch import Watch
+
+
+@pytest.fixture
+def watch():
+    return Watch(parent=Loggable())
+
+
+@pytest.mark.parametrize(
+    "query", ["wait=Pending,Running", "wait=Pending&wait=Running"]
+)
+def test_wait_splits_phases(watch, query):
+    req = falcon.testing.create_req(query_string=query)
+    wait, timeout = watch.get_watch_opts(req)
+    assert sorted(wait) == ["Pending", "Running"]
+    assert timeout == 60
+
+
+def test_wait_completed_adds_terminal_phases(watch):
+    req = falcon.testing.create_req(query_string="wait=Running,completed")
+    wait, _ = watch.get_watch_opts(req)
+    assert set(wait) == set(["Running", "completed"] + TERMINAL_PHASES)
+
+
+def test_wait_for_matches_any_phase(watch):
+    events = [
+        {"name": "wf", "phase": "Pending", "nodes": {}},
+        {"name": "wf", "phase": "Running", "nodes": {}},
+        {"name": "wf", "phase": "Succeeded", "nodes": {}},
+    ]
+    watch.watch = lambda req, wf_id, timeout: iter(events)
+    state = watch.wait_for(None, "wf", ["Running", "Failed"], 60)
+    assert state["phase"] == "Running"
+    assert state["timedOut"] is False
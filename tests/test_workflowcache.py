@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+import pytest
+from kubernetes.client.rest import ApiException
+from rubin_jupyter_utils.hub import Loggable
+from wfdispatcher.objects.workflowcache import WorkflowCache
+
+
+class FakeCustomApi(object):
+    """List one workflow, noting whether the cache claimed to be synced
+    during each list.  Watching fails with 'watch_error'.
+    """
+
+    def __init__(self):
+        self.cache = None
+        self.synced_during_list = []
+        self.watch_error = ApiException(status=500, reason="Boom")
+
+    def list_cluster_custom_object(self, *args, **kwargs):
+        if kwargs.get("watch"):
+            raise self.watch_error
+        self.synced_during_list.append(self.cache.synced)
+        if len(self.synced_during_list) > 1:
+            self.cache.stop()
+        return {
+            "metadata": {"resourceVersion": "7"},
+            "items": [{"metadata": {"namespace": "ns", "name": "wf"}}],
+        }
+
+
+@pytest.fixture
+def api():
+    return FakeCustomApi()
+
+
+@pytest.fixture
+def cache(api):
+    pool = SimpleNamespace(get_custom_api=lambda: api)
+    wf_cache = WorkflowCache(
+        parent=Loggable(), client_pool=pool, retry_interval=0
+    )
+    api.cache = wf_cache
+    return wf_cache
+
+
+def test_relist_after_watch_failure_is_not_synced(cache, api):
+    cache._run()
+    assert api.synced_during_list == [False, False]
+    assert cache.synced
+    assert cache.get("ns", "wf")
+
+
+def test_watch_failure_clears_synced(cache, api):
+    seen = []
+
+    def retry_wait(timeout):
+        seen.append(cache.synced)
+        cache._stop.set()
+        return True
+
+    cache._stop.wait = retry_wait
+    cache._run()
+    assert seen == [False]
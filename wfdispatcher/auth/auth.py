@@ -1,8 +1,11 @@
-from eliot import start_action
+import time
+from ..objects.actionlog import start_action
 from rubin_jupyter_utils.hub import LoggableChild
 from ..helpers.extract_user_from_req import extract_user_from_req
 from ..helpers.make_mock_user import make_mock_user
 from ..helpers.mockspawner import MockSpawner
+from ..objects.metrics import AUTH_LATENCY
+from .claimscache import ClaimsCache
 
 
 class AuthenticatorMiddleware(LoggableChild):
@@ -19,11 +22,21 @@ class AuthenticatorMiddleware(LoggableChild):
             "auth_header_name", "X-Portal-Authorization"
         )
         self.username_claim_field = kwargs.pop("username_claim_field", "uid")
+        self.claims_cache = kwargs.pop("claims_cache", None)
+        if not self.claims_cache:
+            self.claims_cache = ClaimsCache()
+        self.exempt_paths = kwargs.pop("exempt_paths", [])
         self.user = None
         self.spawner = None
 
     def process_request(self, req, resp):
-        """Get auth token from request.  Raise if it does not validate."""
+        """Get auth token from request.  Raise if it does not validate.
+        The resulting User is stored as req.context.user for handlers.
+        Requests for any of 'exempt_paths' are not authenticated.
+        """
+        if req.path in self.exempt_paths:
+            return
+        start = time.perf_counter()
         with start_action(action_type="process_request/extract_auth"):
             user = None
             if self._mock:
@@ -32,11 +45,16 @@ class AuthenticatorMiddleware(LoggableChild):
                 self.log.debug("Mocked out process_request")
             else:
                 user = extract_user_from_req(
-                    req, self.auth_header_name, self.username_claim_field
+                    req,
+                    self.auth_header_name,
+                    self.username_claim_field,
+                    claims_cache=self.claims_cache,
                 )
             if not user:
                 raise RuntimeError("Could not determine user!")
             self.set_auth_fields(user=user)
+            req.context.user = user
+        AUTH_LATENCY.observe(time.perf_counter() - start)
 
     def set_auth_fields(self, user=None):
         """Given a user, create appropriate attributes."""
@@ -0,0 +1,68 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class ClaimsCache(object):
+    """Bounded LRU cache of verified token claims, keyed by a hash of the
+    token so that the tokens themselves are not retained.
+
+    An entry expires at the token's 'exp' claim, or after 'max_age'
+    seconds, whichever comes first, so a revoked token is re-checked
+    within max_age.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.maxsize = kwargs.pop("maxsize", 1024)
+        self.max_age = kwargs.pop("max_age", 300)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, token):
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token):
+        """Return cached claims for the token, or None.
+        """
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expiry = entry
+            if expiry <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token, claims):
+        expiry = time.time() + self.max_age
+        exp = claims.get("exp")
+        if exp:
+            expiry = min(expiry, float(exp))
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (claims, expiry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        cd = {
+            "maxsize": self.maxsize,
+            "max_age": self.max_age,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+        return cd
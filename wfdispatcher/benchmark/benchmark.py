@@ -0,0 +1,200 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from rubin_jupyter_utils.hub import Loggable
+from wsgiserver import WSGIServer
+from ..helpers.make_auth_header import make_auth_header
+from ..helpers.make_post_body import make_post_body
+from ..server.server import Server
+from .fakeapi import FakeKubernetesApi
+
+OPERATIONS = ["list", "new", "get", "logs", "details"]
+
+
+class Benchmark(Loggable):
+    """Measure the dispatcher's throughput and latency.
+
+    A Server, with mock authentication, is started against a
+    FakeKubernetesApi holding 'workflows' workflows of 'pods' pods each,
+    whose every response is delayed by 'latency' seconds (plus up to
+    'jitter').  Then, for each of 'operations', 'requests' requests are
+    made, 'concurrency' at a time.  'server_options' are passed to the
+    Server.
+
+    run() returns, per operation, the request count, errors, requests
+    per second, p50 and p99 latency in seconds, and the number of fake
+    API calls made per request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.operations = kwargs.pop("operations", OPERATIONS)
+        self.requests = kwargs.pop("requests", 200)
+        self.concurrency = kwargs.pop("concurrency", 10)
+        self.server_options = kwargs.pop("server_options", {})
+        self.workflows = max(kwargs.pop("workflows", 100), 1)
+        self.fake = FakeKubernetesApi(
+            latency=kwargs.pop("latency", 0.0),
+            jitter=kwargs.pop("jitter", 0.0),
+            workflows=self.workflows,
+            pods=max(kwargs.pop("pods", 3), 1),
+            log_lines=kwargs.pop("log_lines", 100),
+        )
+        self.url = None
+        self.headers = {}
+        self.body = None
+        self._local = threading.local()
+
+    def run(self):
+        results = {}
+        self.fake.start()
+        workdir = tempfile.mkdtemp(prefix="wfbench-")
+        options = dict(self.server_options)
+        options.update(self._write_config_files(workdir))
+        server = Server(_mock=True, **options)
+        port = _free_port()
+        httpd = WSGIServer(
+            server.app,
+            host="127.0.0.1",
+            port=port,
+            numthreads=self.concurrency,
+        )
+        thread = threading.Thread(target=httpd.start, daemon=True)
+        thread.start()
+        self.url = "http://127.0.0.1:{}".format(port)
+        hname, hval = make_auth_header(_mock=True).split(": ", 1)
+        self.headers = {hname: hval, "Content-Type": "application/json"}
+        self.body = json.loads(make_post_body())
+        try:
+            self._wait_for_server()
+            for op in self.operations:
+                results[op] = self.measure(op)
+        finally:
+            try:
+                httpd.stop()
+            except AttributeError as exc:
+                # wsgiserver's stop() still calls Thread.isAlive(), which is
+                #  gone in Python 3.9; by then the socket is closed, and the
+                #  worker threads are daemons.
+                self.log.debug("Server stop incomplete: {}".format(exc))
+            if server.wf_cache:
+                server.wf_cache.stop()
+            server.configmap_cache.stop()
+            self.fake.stop()
+            shutil.rmtree(workdir, ignore_errors=True)
+        return results
+
+    def _write_config_files(self, workdir):
+        """Write a kubeconfig for the fake API, and minimal volume,
+        resource map and base passwd and group files to read in place of
+        the ones a real deployment mounts, into 'workdir'.  Return the
+        Server options naming them.
+        """
+        files = {}
+        for attr, fn, data in [
+            ("kube_config", "kubeconfig.json", self.fake.kubeconfig()),
+            ("volume_definition_file", "mountpoints.json", []),
+            ("resource_map", "resourcemap.json", []),
+            ("base_passwd_file", "passwd", "root:x:0:0::/root:/bin/sh\n"),
+            ("base_group_file", "group", "root:x:0:\n"),
+        ]:
+            path = os.path.join(workdir, fn)
+            with open(path, "w") as f:
+                if isinstance(data, str):
+                    f.write(data)
+                else:
+                    json.dump(data, f)
+            files[attr] = path
+        return {
+            "kube_config": files.pop("kube_config"),
+            "config_overrides": files,
+        }
+
+    def _wait_for_server(self, timeout=10):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                requests.get(self.url + "/version", headers=self.headers)
+                return
+            except requests.ConnectionError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def _request(self, op, idx):
+        wf_id = "bench-{}".format(idx % self.workflows)
+        url = self.url
+        if op == "list":
+            args = ("GET", url + "/workflows")
+        elif op == "new":
+            args = ("POST", url + "/new")
+        elif op == "get":
+            args = ("GET", "{}/workflow/{}".format(url, wf_id))
+        elif op == "logs":
+            args = ("GET", "{}/workflow/{}/logs".format(url, wf_id))
+        elif op == "details":
+            args = (
+                "GET",
+                "{}/workflow/{}/details/{}-1000".format(url, wf_id, wf_id),
+            )
+        else:
+            raise ValueError(
+                "Operation '{}' not one of '{}'".format(op, OPERATIONS)
+            )
+        body = self.body if op == "new" else None
+        start = time.perf_counter()
+        try:
+            resp = self._session().request(*args, json=body)
+            ok = resp.status_code < 400
+        except requests.RequestException as exc:
+            self.log.error("{} failed: {}".format(op, exc))
+            ok = False
+        return time.perf_counter() - start, ok
+
+    def measure(self, op):
+        self.log.info(
+            "Running {} '{}' requests, {} at a time.".format(
+                self.requests, op, self.concurrency
+            )
+        )
+        calls = self.fake.total_calls
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            res = list(
+                pool.map(lambda x: self._request(op, x), range(self.requests))
+            )
+        elapsed = time.perf_counter() - start
+        calls = self.fake.total_calls - calls
+        lat = sorted(x[0] for x in res)
+        return {
+            "requests": len(res),
+            "errors": len([x for x in res if not x[1]]),
+            "rps": len(res) / elapsed,
+            "p50": _percentile(lat, 0.50),
+            "p99": _percentile(lat, 0.99),
+            "upstream_per_request": calls / len(res),
+        }
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
@@ -0,0 +1,338 @@
+"""A small in-memory stand-in for the Kubernetes API server, good enough
+to serve the core and Argo Workflow calls the dispatcher makes.
+"""
+import json
+import random
+import string
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+class FakeKubernetesApi(object):
+    """Serve a generic, in-memory Kubernetes REST API on 'port' (0 picks
+    a free one).
+
+    Any object POSTed to a collection is stored and can then be read,
+    listed, replaced, patched or deleted; a read of a missing object is a
+    404, a create of an existing one a 409.  Workflows are given a
+    finished status with 'pods' Pod nodes when created, and pod logs are
+    'log_lines' lines long.  The Namespace 'namespace' exists, holding
+    'workflows' finished workflows, at startup.
+
+    Every request sleeps for 'latency' seconds, plus up to 'jitter' more,
+    before it is answered, and is counted in 'calls', by method and
+    resource.  Watches are held open, with no events, until they time
+    out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.port = kwargs.pop("port", 0)
+        self.latency = kwargs.pop("latency", 0.0)
+        self.jitter = kwargs.pop("jitter", 0.0)
+        self.pods = kwargs.pop("pods", 3)
+        self.log_lines = kwargs.pop("log_lines", 100)
+        self.namespace = kwargs.pop("namespace", "user-kkinnison")
+        self.calls = {}
+        self._objects = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._httpd = None
+        self._thread = None
+        self._store(
+            ("/api/v1", "namespaces"),
+            None,
+            {
+                "apiVersion": "v1",
+                "kind": "Namespace",
+                "metadata": {"name": self.namespace},
+            },
+        )
+        for idx in range(kwargs.pop("workflows", 0)):
+            self.create_workflow(self.namespace, "bench-{}".format(idx))
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{}".format(self.port)
+
+    @property
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+    def start(self):
+        api = self
+
+        class Handler(FakeApiHandler):
+            fake = api
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fake-k8s", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def kubeconfig(self):
+        """Return a kubeconfig document pointing at this server.
+        """
+        return {
+            "apiVersion": "v1",
+            "kind": "Config",
+            "clusters": [{"name": "fake", "cluster": {"server": self.url}}],
+            "users": [{"name": "fake", "user": {"token": "fake"}}],
+            "contexts": [
+                {
+                    "name": "fake",
+                    "context": {"cluster": "fake", "user": "fake"},
+                }
+            ],
+            "current-context": "fake",
+        }
+
+    def create_workflow(self, namespace, name):
+        key = ("/apis/argoproj.io/v1alpha1", "workflows")
+        obj = {
+            "apiVersion": "argoproj.io/v1alpha1",
+            "kind": "Workflow",
+            "metadata": {"name": name, "namespace": namespace},
+            "spec": {},
+        }
+        self._store(key, namespace, obj)
+
+    def _store(self, key, namespace, obj):
+        md = obj.setdefault("metadata", {})
+        if not md.get("name"):
+            suffix = "".join(
+                random.choice(string.ascii_lowercase) for _ in range(5)
+            )
+            md["name"] = "{}{}".format(md.get("generateName", ""), suffix)
+        if namespace:
+            md["namespace"] = namespace
+        now = datetime.now(timezone.utc).strftime(TIME_FORMAT)
+        md.setdefault("creationTimestamp", now)
+        md.setdefault("uid", "{:032x}".format(random.getrandbits(128)))
+        if key[1] == "workflows":
+            obj["status"] = self._workflow_status(md["name"], now)
+        with self._lock:
+            coll = self._objects.setdefault(key, {})
+            if (namespace, md["name"]) in coll:
+                return None
+            self._version += 1
+            md["resourceVersion"] = str(self._version)
+            coll[(namespace, md["name"])] = obj
+        return obj
+
+    def _workflow_status(self, name, now):
+        nodes = {
+            name: {
+                "id": name,
+                "name": name,
+                "type": "Steps",
+                "phase": "Succeeded",
+                "startedAt": now,
+                "finishedAt": now,
+            }
+        }
+        for idx in range(self.pods):
+            node_id = "{}-{}".format(name, 1000 + idx)
+            nodes[node_id] = {
+                "id": node_id,
+                "name": "{}[{}]".format(name, idx),
+                "type": "Pod",
+                "phase": "Succeeded",
+                "startedAt": now,
+                "finishedAt": now,
+            }
+        return {
+            "phase": "Succeeded",
+            "startedAt": now,
+            "finishedAt": now,
+            "nodes": nodes,
+        }
+
+
+def parse_path(path):
+    """Split a Kubernetes API path into (API prefix, resource, namespace,
+    name, subresource); any but the first two may be None.
+    """
+    segs = [x for x in path.split("/") if x]
+    if segs[0] == "api":
+        prefix, segs = "/" + "/".join(segs[:2]), segs[2:]
+    else:
+        prefix, segs = "/" + "/".join(segs[:3]), segs[3:]
+    namespace = None
+    if len(segs) >= 3 and segs[0] == "namespaces":
+        namespace, segs = segs[1], segs[2:]
+    resource = segs[0]
+    name = segs[1] if len(segs) > 1 else None
+    sub = segs[2] if len(segs) > 2 else None
+    return prefix, resource, namespace, name, sub
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    fake = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _begin(self):
+        fake = self.fake
+        url = urlparse(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self.parts = parse_path(url.path)
+        label = "{} {}".format(self.command, self.parts[1])
+        if self.parts[4]:
+            label += "/" + self.parts[4]
+        with fake._lock:
+            fake.calls[label] = fake.calls.get(label, 0) + 1
+        delay = fake.latency + random.uniform(0, fake.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _send(self, code, obj=None, text=None):
+        if text is not None:
+            data = text.encode("utf-8")
+            ctype = "text/plain"
+        else:
+            data = json.dumps(obj).encode("utf-8")
+            ctype = "application/json"
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _status(self, code, reason):
+        self._send(
+            code,
+            {
+                "kind": "Status",
+                "apiVersion": "v1",
+                "status": "Failure",
+                "reason": reason,
+                "code": code,
+            },
+        )
+
+    def _lookup(self):
+        prefix, resource, namespace, name, _ = self.parts
+        if resource == "namespaces" and name:
+            # Namespaces are themselves cluster-scoped objects.
+            namespace = None
+        key = (prefix, resource)
+        return key, namespace, name
+
+    def do_GET(self):
+        self._begin()
+        fake = self.fake
+        key, namespace, name = self._lookup()
+        sub = self.parts[4]
+        if self.query.get("watch") in ("true", "1"):
+            timeout = float(self.query.get("timeoutSeconds") or 60)
+            fake._stop.wait(min(timeout, 300))
+            self._send(200, text="")
+            return
+        if sub == "log":
+            # Every pod exists, as far as its logs are concerned.
+            lines = [
+                "{} line {}".format(name, x) for x in range(fake.log_lines)
+            ]
+            self._send(200, text="\n".join(lines) + "\n")
+            return
+        with fake._lock:
+            coll = dict(fake._objects.get(key, {}))
+        if name:
+            obj = coll.get((namespace, name))
+            if obj is None:
+                self._status(404, "NotFound")
+            else:
+                self._send(200, obj)
+            return
+        items = [
+            v
+            for k, v in sorted(coll.items())
+            if not namespace or k[0] == namespace
+        ]
+        self._send(
+            200,
+            {
+                "kind": "List",
+                "apiVersion": "v1",
+                "metadata": {"resourceVersion": str(fake._version)},
+                "items": items,
+            },
+        )
+
+    def do_POST(self):
+        self._begin()
+        key, namespace, _ = self._lookup()
+        obj = self.fake._store(key, namespace, self._body())
+        if obj is None:
+            self._status(409, "AlreadyExists")
+            return
+        self._send(201, obj)
+
+    def do_PUT(self):
+        self._begin()
+        fake = self.fake
+        key, namespace, name = self._lookup()
+        obj = self._body()
+        with fake._lock:
+            coll = fake._objects.get(key, {})
+            if (namespace, name) not in coll:
+                obj = None
+            else:
+                coll[(namespace, name)] = obj
+        if obj is None:
+            self._status(404, "NotFound")
+            return
+        self._send(200, obj)
+
+    def do_PATCH(self):
+        self._begin()
+        fake = self.fake
+        key, namespace, name = self._lookup()
+        patch = self._body()
+        with fake._lock:
+            obj = fake._objects.get(key, {}).get((namespace, name))
+            if obj is not None and isinstance(patch, dict):
+                for fld, val in patch.items():
+                    if isinstance(val, dict):
+                        obj.setdefault(fld, {}).update(val)
+                    else:
+                        obj[fld] = val
+        if obj is None:
+            self._status(404, "NotFound")
+            return
+        self._send(200, obj)
+
+    def do_DELETE(self):
+        self._begin()
+        fake = self.fake
+        key, namespace, name = self._lookup()
+        with fake._lock:
+            obj = fake._objects.get(key, {}).pop((namespace, name), None)
+        if obj is None:
+            self._status(404, "NotFound")
+            return
+        self._send(200, obj)
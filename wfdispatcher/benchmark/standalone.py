@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+from .benchmark import Benchmark, OPERATIONS
+
+
+def standalone():
+    """Standalone command for benchmarking the dispatcher against a fake
+    Kubernetes API.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark Argo Workflow API Dispatch Server"
+    )
+    parser.add_argument(
+        "-o",
+        "--operations",
+        help="Comma-separated operations to measure, from '{}'".format(
+            ",".join(OPERATIONS)
+        ),
+        default=",".join(OPERATIONS),
+    )
+    parser.add_argument(
+        "-n",
+        "--requests",
+        help="Requests per operation",
+        type=int,
+        default=200,
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        help="Concurrent requests (and server threads)",
+        type=int,
+        default=10,
+    )
+    parser.add_argument(
+        "--latency",
+        help="Fake API response delay, in milliseconds",
+        type=float,
+        default=0.0,
+    )
+    parser.add_argument(
+        "--jitter",
+        help="Maximum extra random fake API delay, in milliseconds",
+        type=float,
+        default=0.0,
+    )
+    parser.add_argument(
+        "--workflows",
+        help="Workflows in the fake namespace",
+        type=int,
+        default=100,
+    )
+    parser.add_argument(
+        "--pods", help="Pods in each fake workflow", type=int, default=3
+    )
+    parser.add_argument(
+        "--log-lines", help="Lines in each fake pod log", type=int, default=100
+    )
+    parser.add_argument(
+        "--workflow-cache",
+        action="store_true",
+        help="Run the server with its watch-maintained workflow cache",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print results as JSON"
+    )
+    parser.add_argument(
+        "-d", "--debug", action="store_true", help="Enable debug logging."
+    )
+    args = parser.parse_args()
+    bench = Benchmark(
+        operations=args.operations.split(","),
+        requests=args.requests,
+        concurrency=args.concurrency,
+        latency=args.latency / 1000.0,
+        jitter=args.jitter / 1000.0,
+        workflows=args.workflows,
+        pods=args.pods,
+        log_lines=args.log_lines,
+        server_options={
+            "workflow_cache": args.workflow_cache,
+            "configmap_gc_interval": 0,
+        },
+    )
+    if args.debug:
+        bench.log.setLevel(logging.DEBUG)
+    results = bench.run()
+    if args.json:
+        print(json.dumps(results, sort_keys=True, indent=4))
+        return
+    fmt = "{:<10} {:>8} {:>7} {:>9} {:>10} {:>10} {:>9}"
+    print(
+        fmt.format(
+            "operation",
+            "requests",
+            "errors",
+            "req/s",
+            "p50 ms",
+            "p99 ms",
+            "upstream",
+        )
+    )
+    for op, res in results.items():
+        print(
+            fmt.format(
+                op,
+                res["requests"],
+                res["errors"],
+                "{:.1f}".format(res["rps"]),
+                "{:.1f}".format(res["p50"] * 1000),
+                "{:.1f}".format(res["p99"] * 1000),
+                "{:.2f}".format(res["upstream_per_request"]),
+            )
+        )
+
+
+if __name__ == "__main__":
+    standalone()
@@ -0,0 +1,308 @@
+import asyncio
+import json
+from rubin_jupyter_utils.hub import Loggable
+from rubin_jupyter_utils.helpers import get_access_token
+from .responsecache import ResponseCache
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+STATUS_FIELDS = ["name", "phase", "startedAt", "finishedAt", "message"]
+
+
+class AsyncClient(Loggable):
+    """Asynchronous client for the workflow dispatcher API, for fanning
+    out many requests at once (e.g. from a notebook).
+
+    It offers the same operations as Client, but as coroutines that
+    return their results rather than storing them in last_response, and
+    raise httpx.HTTPStatusError if the server reports an error.  Logs
+    and watch events can also be consumed as async iterators.
+
+    Connections are pooled, at most 'max_connections' at a time;
+    'timeout', 'connect_timeout', 'retries' (of failed connections)
+    and 'response_cache_size' are as for Client.  Use it as an async
+    context manager, or call aclose() when done.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if httpx is None:
+            raise RuntimeError(
+                "AsyncClient requires httpx: pip install 'wfdispatcher[async]'"
+            )
+        super().__init__(*args, **kwargs)
+        self.auth_header_name = kwargs.pop(
+            "auth_header_name", "X-Portal-Authorization"
+        )
+        access_token = kwargs.pop("access_token", None)
+        if not access_token:
+            tokenfile = kwargs.pop("tokenfile", None)
+            access_token = get_access_token(tokenfile=tokenfile)
+        if not access_token:
+            raise RuntimeError("Could not determine access token!")
+        self.access_token = access_token
+        api_url = kwargs.pop("api_url", "http://localhost:8080/")
+        # Canonicalize
+        if not api_url.endswith("/"):
+            api_url = "{}/".format(api_url)
+        self.api_url = api_url
+        self.timeout = kwargs.pop("timeout", 30)
+        self.connect_timeout = kwargs.pop("connect_timeout", 5)
+        self.session = httpx.AsyncClient(
+            base_url=self.api_url,
+            headers={
+                self.auth_header_name: "bearer {}".format(self.access_token),
+                "Content-Type": "application/json",
+            },
+            timeout=self._timeout(),
+            limits=httpx.Limits(
+                max_connections=kwargs.pop("max_connections", 20)
+            ),
+            transport=httpx.AsyncHTTPTransport(
+                retries=kwargs.pop("retries", 3)
+            ),
+        )
+        self.response_cache = None
+        response_cache_size = kwargs.pop("response_cache_size", 256)
+        if response_cache_size:
+            self.response_cache = ResponseCache(maxsize=response_cache_size)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.session.aclose()
+
+    def _timeout(self, read_timeout=-1):
+        if read_timeout == -1:
+            read_timeout = self.timeout
+        return httpx.Timeout(
+            self.timeout, connect=self.connect_timeout, read=read_timeout
+        )
+
+    async def request(
+        self, path="", verb="GET", params=None, data=None, read_timeout=-1
+    ):
+        """Make a request and return the decoded JSON response.
+        """
+        body, _ = await self.request_with_headers(
+            path,
+            verb=verb,
+            params=params,
+            data=data,
+            read_timeout=read_timeout,
+        )
+        return body
+
+    async def request_with_headers(
+        self, path="", verb="GET", params=None, data=None, read_timeout=-1
+    ):
+        """Make a request and return a tuple of (decoded JSON response,
+        response headers).
+        """
+        if data is not None:
+            data = dict(data)
+            data["access_token"] = self.access_token
+        self.log.debug("Making request {} {}".format(verb, path))
+        headers = None
+        cache_key = None
+        cached = None
+        if verb == "GET" and self.response_cache:
+            cache_key = self.response_cache.key(path, params)
+            cached = self.response_cache.get(cache_key)
+            if cached:
+                headers = {"If-None-Match": cached[0]}
+        response = await self.session.request(
+            verb,
+            path,
+            params=params,
+            json=data,
+            headers=headers,
+            timeout=self._timeout(read_timeout),
+        )
+        if response.status_code == 304 and cached:
+            return cached[1], response.headers
+        response.raise_for_status()
+        body = response.json()
+        etag = response.headers.get("ETag")
+        if cache_key and etag and response.status_code == 200:
+            self.response_cache.put(cache_key, etag, body)
+        return body, response.headers
+
+    async def list(
+        self,
+        limit=None,
+        continue_token=None,
+        phases=None,
+        labels=None,
+        fields=None,
+    ):
+        """Return one page of the workflow list, as a tuple of (workflows,
+        continue token for the next page or None).
+        """
+        params = {}
+        if limit:
+            params["limit"] = limit
+        if continue_token:
+            params["continue"] = continue_token
+        if phases:
+            params["phase"] = list(phases)
+        if labels:
+            params["labels"] = labels
+        if fields:
+            params["fields"] = list(fields)
+        wfs, headers = await self.request_with_headers("", params=params)
+        return wfs, headers.get("X-Continue-Token")
+
+    async def list_all(self, page_size=500, **filters):
+        wfs = []
+        token = None
+        while True:
+            page, token = await self.list(
+                limit=page_size, continue_token=token, **filters
+            )
+            wfs.extend(page)
+            if not token:
+                return wfs
+
+    async def new(self, data):
+        return await self.request("new", verb="POST", data=data)
+
+    async def new_batch(self, data):
+        return await self.request("new/batch", verb="POST", data=data)
+
+    async def submission(self, sub_id):
+        return await self.request("submission/{}".format(sub_id))
+
+    async def version(self):
+        return await self.request("version")
+
+    async def delete(self, wf_id):
+        return await self.request("workflow/{}".format(wf_id), verb="DELETE")
+
+    async def inspect(self, wf_id, full=False):
+        params = {"view": "full"} if full else None
+        return await self.request("workflow/{}".format(wf_id), params=params)
+
+    async def pods(self, wf_id):
+        return await self.request("workflow/{}/pods".format(wf_id))
+
+    async def details(self, wf_id, pod_id):
+        return await self.request(
+            "workflow/{}/details/{}".format(wf_id, pod_id)
+        )
+
+    async def command(self, wf_id):
+        return await self.request("workflow/{}/command".format(wf_id))
+
+    async def logs(self, wf_id, **log_opts):
+        """Return the workflow's logs as a list of
+        {"name": <pod>, "logs": <text>}.
+        """
+        loglist = []
+        async for rec in self.stream_logs(wf_id, **log_opts):
+            if "error" in rec:
+                loglist.append(
+                    {"name": rec["name"], "logs": None, "error": rec["error"]}
+                )
+                continue
+            if not loglist or loglist[-1]["name"] != rec["name"]:
+                loglist.append({"name": rec["name"], "logs": ""})
+            loglist[-1]["logs"] += rec["line"] + "\n"
+        return loglist
+
+    async def stream_logs(
+        self,
+        wf_id,
+        follow=False,
+        tail_lines=None,
+        since_seconds=None,
+        limit_bytes=None,
+    ):
+        """Async iterator over {"name": <pod>, "line": <text>} for each log
+        line as the server sends it.
+        """
+        params = {"stream": "true"}
+        if follow:
+            params["follow"] = "true"
+        if tail_lines is not None:
+            params["tail_lines"] = tail_lines
+        if since_seconds is not None:
+            params["since_seconds"] = since_seconds
+        if limit_bytes is not None:
+            params["limit_bytes"] = limit_bytes
+        async for rec in self._stream_ndjson(
+            "workflow/{}/logs".format(wf_id),
+            params,
+            read_timeout=None if follow else -1,
+        ):
+            yield rec
+
+    async def watch(self, wf_id, timeout=60):
+        """Async iterator over the workflow's status change events.
+        """
+        async for event in self._stream_ndjson(
+            "workflow/{}/watch".format(wf_id),
+            {"timeout": timeout},
+            read_timeout=timeout + self.timeout,
+        ):
+            yield event
+
+    async def _stream_ndjson(self, path, params, read_timeout=-1):
+        async with self.session.stream(
+            "GET", path, params=params, timeout=self._timeout(read_timeout)
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    yield json.loads(line)
+
+    async def wait(self, wf_id, phases=None, poll_timeout=60):
+        """Wait until the workflow reaches one of 'phases' (default: any
+        terminal phase) or finishes, and return its final state.
+        """
+        wait = ",".join(phases) if phases else "completed"
+        while True:
+            state = await self.request(
+                "workflow/{}/watch".format(wf_id),
+                params={"wait": wait, "timeout": poll_timeout},
+                read_timeout=poll_timeout + self.timeout,
+            )
+            if not state.get("timedOut"):
+                return state
+
+    async def gather(self, coros, concurrency=20):
+        """Run the coroutines, at most 'concurrency' at a time, and return
+        their results in order.  A coroutine that raises contributes its
+        exception instead of a result.
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def bounded(coro):
+            async with sem:
+                return await coro
+
+        return await asyncio.gather(
+            *[bounded(x) for x in coros], return_exceptions=True
+        )
+
+    async def gather_status(self, wf_ids, concurrency=20):
+        """Return a dict mapping each workflow ID to its name, phase, start
+        and finish times and message, or to {"error": <text>} if it could
+        not be read.
+        """
+        results = await self.gather(
+            [self.inspect(x) for x in wf_ids], concurrency=concurrency
+        )
+        status = {}
+        for wf_id, res in zip(wf_ids, results):
+            if isinstance(res, Exception):
+                status[wf_id] = {"error": str(res)}
+            else:
+                status[wf_id] = {x: res.get(x) for x in STATUS_FIELDS}
+        return status
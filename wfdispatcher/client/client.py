@@ -1,12 +1,51 @@
 import json
+import logging
+import random
+import time
 import requests
-from eliot import log_call
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ..objects.actionlog import log_call
+from .responsecache import ResponseCache
 from json.decoder import JSONDecodeError
 from rubin_jupyter_utils.hub import Loggable
 from rubin_jupyter_utils.helpers import get_access_token
 
 
+class JitteredRetry(Retry):
+    """Retry whose exponential backoff is stretched by a random factor of
+    up to 'jitter', so that many clients retrying at once spread out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.jitter = kwargs.pop("jitter", 0.5)
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kw):
+        kw.setdefault("jitter", self.jitter)
+        return super().new(**kw)
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff * (1 + random.uniform(0, self.jitter))
+
+
 class Client(Loggable):
+    """Client for the workflow dispatcher API.
+
+    Requests go through one requests.Session, so connections to the
+    server are kept alive and reused.  Each request times out after
+    'connect_timeout' seconds trying to connect and 'timeout' seconds
+    waiting for data.  Connection failures, and 502, 503 and 504
+    responses to requests other than POST, are retried up to 'retries'
+    times, with jittered exponential backoff starting at
+    'backoff_factor' seconds.
+
+    GETs are conditional: the last 'response_cache_size' (0 disables)
+    response bodies are kept with their ETags, and reused when the server
+    reports that they have not changed.
+    """
+
     def __init__(self, *args, **kwargs):
         self.access_token = None
         self.auth_header_name = "X-Portal-Authorization"
@@ -14,6 +53,7 @@ class Client(Loggable):
         self.api_url = "http://localhost:8080/"
         self.headers = {}
         self.last_response = None
+        self.continue_token = None
         self.data = None
         self.post_json_file = None
 
@@ -43,6 +83,40 @@ class Client(Loggable):
         self.post_json_file = post_json_file
         if not self.data and self.post_json_file:
             self.load_data()
+        self.timeout = kwargs.pop("timeout", 30)
+        self.connect_timeout = kwargs.pop("connect_timeout", 5)
+        self.session = self.make_session(
+            retries=kwargs.pop("retries", 3),
+            backoff_factor=kwargs.pop("backoff_factor", 0.5),
+            pool_maxsize=kwargs.pop("pool_maxsize", 10),
+        )
+        self.response_cache = None
+        response_cache_size = kwargs.pop("response_cache_size", 256)
+        if response_cache_size:
+            self.response_cache = ResponseCache(maxsize=response_cache_size)
+
+    def make_session(self, retries=3, backoff_factor=0.5, pool_maxsize=10):
+        retry = JitteredRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        # requests decompresses these transparently.
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        return session
+
+    def _timeout(self, read_timeout=-1):
+        """Return a (connect, read) timeout tuple; read_timeout of None
+        means wait forever.
+        """
+        if read_timeout == -1:
+            read_timeout = self.timeout
+        return (self.connect_timeout, read_timeout)
 
     @log_call
     def make_headers(self):
@@ -53,8 +127,28 @@ class Client(Loggable):
             "Content-Type": "application/json",
         }
 
+    def _log_opts(
+        self,
+        follow=False,
+        tail_lines=None,
+        since_seconds=None,
+        limit_bytes=None,
+    ):
+        params = {}
+        if follow:
+            params["follow"] = "true"
+        if tail_lines is not None:
+            params["tail_lines"] = tail_lines
+        if since_seconds is not None:
+            params["since_seconds"] = since_seconds
+        if limit_bytes is not None:
+            params["limit_bytes"] = limit_bytes
+        return params
+
     @log_call
-    def make_request(self, path=None, verb="GET"):
+    def make_request(
+        self, path=None, verb="GET", params=None, read_timeout=-1
+    ):
         verb = verb.upper()
         data = self.data
         if path is None:
@@ -66,6 +160,42 @@ class Client(Loggable):
         else:
             data = None
         url = "{}{}".format(self.api_url, path)
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(self._describe_request(verb, url, data))
+        headers = self.headers
+        cache_key = None
+        cached = None
+        if verb == "GET" and self.response_cache:
+            cache_key = self.response_cache.key(url, params)
+            cached = self.response_cache.get(cache_key)
+            if cached:
+                headers = dict(headers)
+                headers["If-None-Match"] = cached[0]
+        response = self.session.request(
+            verb,
+            url,
+            headers=headers,
+            json=data,
+            params=params,
+            timeout=self._timeout(read_timeout),
+        )
+        self.continue_token = response.headers.get("X-Continue-Token")
+        if response.status_code == 304 and cached:
+            self.log.debug("{} not modified".format(url))
+            self.last_response = cached[1]
+            return
+        try:
+            jr = response.json()
+            self.last_response = jr
+            etag = response.headers.get("ETag")
+            if cache_key and etag and response.status_code == 200:
+                self.response_cache.put(cache_key, etag, jr)
+        except JSONDecodeError as exc:
+            self.log.error("{}: JSON decode failed".format(exc))
+            self.log.error("Response was: {}".format(response.text))
+            self.last_response = None
+
+    def _describe_request(self, verb, url, data):
         dstr = "Making request {} {} ".format(verb, url)
         h_copy = {}
         h_copy.update(self.headers)
@@ -79,15 +209,7 @@ class Client(Loggable):
             dstr += " and data '{}'".format(
                 json.dumps(d_copy, sort_keys=True, indent=4)
             )
-        self.log.debug(dstr)
-        response = requests.request(verb, url, headers=self.headers, json=data)
-        try:
-            jr = response.json()
-            self.last_response = jr
-        except JSONDecodeError as exc:
-            self.log.error("{}: JSON decode failed".format(exc))
-            self.log.error("Response was: {}".format(response.text))
-            self.last_response = None
+        return dstr
 
     @log_call
     def load_data(self):
@@ -96,13 +218,64 @@ class Client(Loggable):
         self.log.debug("Loaded data: {}".format(self.data))
 
     @log_call
-    def list(self):
-        self.make_request()
+    def list(
+        self,
+        limit=None,
+        continue_token=None,
+        phases=None,
+        labels=None,
+        fields=None,
+    ):
+        """List workflows into last_response.  If 'limit' is set and more
+        remain, the token for the next page is left in continue_token.
+        """
+        params = {}
+        if limit:
+            params["limit"] = limit
+        if continue_token:
+            params["continue"] = continue_token
+        if phases:
+            params["phase"] = ",".join(phases)
+        if labels:
+            params["labels"] = labels
+        if fields:
+            params["fields"] = ",".join(fields)
+        self.make_request(params=params)
+
+    @log_call
+    def list_all(self, page_size=500, **filters):
+        """Page through the whole listing, leaving it all in
+        last_response.
+        """
+        wfs = []
+        token = None
+        while True:
+            self.list(limit=page_size, continue_token=token, **filters)
+            wfs.extend(self.last_response or [])
+            token = self.continue_token
+            if not token:
+                break
+        self.last_response = wfs
 
     @log_call
     def new(self):
         self.make_request(verb="POST", path="new")
 
+    @log_call
+    def new_batch(self):
+        """Submit 'data' as a batch: either {"items": [<body>, ...]} or
+        {"template": <body>, "parameters": {<KEY>: [<value>, ...]}}.
+        last_response is the per-item list of results.
+        """
+        self.make_request(verb="POST", path="new/batch")
+
+    @log_call
+    def submission(self, sub_id):
+        """Look up a queued submission, by the ticket ID new() returned
+        if the server queues submissions.
+        """
+        self.make_request(path="submission/{}".format(sub_id))
+
     @log_call
     def version(self):
         self.make_request(path="version")
@@ -112,12 +285,101 @@ class Client(Loggable):
         self.make_request(verb="DELETE", path="workflow/{}".format(wf_id))
 
     @log_call
-    def inspect(self, wf_id):
-        self.make_request(path="workflow/{}".format(wf_id))
+    def inspect(self, wf_id, full=False):
+        """Read the workflow's summary, or with 'full', the whole
+        workflow object, into last_response.
+        """
+        params = {"view": "full"} if full else None
+        self.make_request(path="workflow/{}".format(wf_id), params=params)
+
+    @log_call
+    def logs(self, wf_id, **log_opts):
+        """Collect the workflow's logs into last_response as a list of
+        {"name": <pod>, "logs": <text>}.  The server streams them, so
+        they are read incrementally rather than as one document.
+        """
+        loglist = []
+        for rec in self.stream_logs(wf_id, **log_opts):
+            if "error" in rec:
+                loglist.append(
+                    {"name": rec["name"], "logs": None, "error": rec["error"]}
+                )
+                continue
+            if not loglist or loglist[-1]["name"] != rec["name"]:
+                loglist.append({"name": rec["name"], "logs": ""})
+            loglist[-1]["logs"] += rec["line"] + "\n"
+        self.last_response = loglist
+
+    def stream_logs(self, wf_id, **log_opts):
+        """Generator yielding {"name": <pod>, "line": <text>} for each
+        log line as the server sends it.  'log_opts' may be any of follow,
+        tail_lines, since_seconds, and limit_bytes.
+        """
+        params = self._log_opts(**log_opts)
+        params["stream"] = "true"
+        # A followed log may be quiet for as long as its pods are.
+        read_timeout = None if log_opts.get("follow") else -1
+        return self._stream_ndjson(
+            "workflow/{}/logs".format(wf_id),
+            params=params,
+            read_timeout=read_timeout,
+        )
+
+    def _stream_ndjson(self, path, params=None, read_timeout=-1):
+        url = "{}{}".format(self.api_url, path)
+        self.log.debug("Streaming from {}".format(url))
+        with self.session.get(
+            url,
+            headers=self.headers,
+            params=params,
+            stream=True,
+            timeout=self._timeout(read_timeout),
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def watch(self, wf_id, timeout=60):
+        """Generator yielding workflow status change events from the
+        server until the workflow finishes or 'timeout' seconds pass.
+        """
+        return self._stream_ndjson(
+            "workflow/{}/watch".format(wf_id),
+            params={"timeout": timeout},
+            read_timeout=timeout + self.timeout,
+        )
+
+    @log_call
+    def wait(self, wf_id, phases=None, timeout=None, poll_timeout=60):
+        """Block until the workflow reaches one of 'phases' (default: any
+        terminal phase) or finishes, using server-side long polls of up
+        to 'poll_timeout' seconds each.  Give up after 'timeout' seconds
+        if it is set.  The final state is left in last_response.
+        """
+        wait = ",".join(phases) if phases else "completed"
+        deadline = None
+        if timeout:
+            deadline = time.monotonic() + timeout
+        while True:
+            pt = poll_timeout
+            if deadline:
+                pt = int(min(pt, deadline - time.monotonic()))
+                if pt < 1:
+                    return
+            self.make_request(
+                path="workflow/{}/watch".format(wf_id),
+                params={"wait": wait, "timeout": pt},
+                read_timeout=pt + self.timeout,
+            )
+            if not self.last_response:
+                return
+            if not self.last_response.get("timedOut"):
+                return
 
     @log_call
-    def logs(self, wf_id):
-        self.make_request(path="workflow/{}/logs".format(wf_id))
+    def command(self, wf_id):
+        self.make_request(path="workflow/{}/command".format(wf_id))
 
     @log_call
     def pods(self, wf_id):
@@ -0,0 +1,44 @@
+import json
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache(object):
+    """Bounded LRU cache of decoded GET response bodies and their ETags,
+    keyed on URL and query parameters, so that a client can make its
+    GETs conditional and reuse the body it already has when the server
+    answers 304 Not Modified.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.maxsize = kwargs.pop("maxsize", 256)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, url, params=None):
+        return (str(url), json.dumps(params or {}, sort_keys=True))
+
+    def get(self, key):
+        """Return a tuple of (etag, body) for the key, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, etag, body):
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        cd = {
+            "maxsize": self.maxsize,
+            "size": len(self._entries),
+        }
+        return cd
@@ -2,6 +2,7 @@
 import argparse
 import logging
 import os
+import sys
 from .client import Client
 
 
@@ -17,6 +18,9 @@ def standalone():
         "rawlogs",
         "pod",
         "details",
+        "command",
+        "submission",
+        "wait",
         "version",
     ]
     api_url = "http://localhost:8080/"
@@ -37,7 +41,8 @@ def standalone():
         help=(
             "Operation (one of 'list', 'create', "
             + "'delete', 'inspect', 'logs', 'rawlogs', "
-            + "'pods', 'details', or 'version')"
+            + "'pods', 'details', 'command', 'submission', 'wait', or "
+            + "'version')"
         ),
     )
     parser.add_argument(
@@ -52,18 +57,74 @@ def standalone():
             + "(required for 'create')"
         ),
     )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        action="store_true",
+        help=(
+            "With 'create', the JSON file holds a batch: a list of "
+            + "'items', or a 'template' and 'parameters' matrix"
+        ),
+    )
     parser.add_argument(
         "-w",
         "--workflow_id",
         default="",
         help=(
             "Workflow ID (required for 'delete', "
-            + "'inspect', 'logs', 'pods', 'details')"
+            + "'inspect', 'logs', 'pods', 'details', 'command', 'wait')"
         ),
     )
+    parser.add_argument(
+        "-s",
+        "--submission_id",
+        default="",
+        help="Submission ticket ID (required for 'submission')",
+    )
     parser.add_argument(
         "-p", "--pod_id", default="", help="Pod ID (required for 'details')"
     )
+    parser.add_argument(
+        "-f",
+        "--follow",
+        action="store_true",
+        help="Follow logs until the workflow's pods exit",
+    )
+    parser.add_argument(
+        "--tail", type=int, help="Only show the last N lines of each log"
+    )
+    parser.add_argument(
+        "--since",
+        type=int,
+        help="Only show log lines from the last N seconds",
+    )
+    parser.add_argument(
+        "--limit-bytes", type=int, help="Maximum bytes of each log to show"
+    )
+    parser.add_argument(
+        "--phase",
+        help="With 'list', only show workflows in these phases (a,b,...)",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        help=(
+            "With 'list', fetch the list in pages of this many workflows "
+            + "(always read live from the cluster)"
+        ),
+    )
+    parser.add_argument(
+        "--fields",
+        help=(
+            "With 'list', workflow fields to show (a,b,...; e.g. "
+            + "'name,phase,startedAt,finishedAt')"
+        ),
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="With 'inspect', show the whole workflow, not a summary",
+    )
     parser.add_argument(
         "-d", "--debug", action="store_true", help="Enable debug logging."
     )
@@ -71,7 +132,16 @@ def standalone():
     op = args.operation
     if op not in allowed:
         raise ValueError("Operation must be one of '{}'".format(allowed))
-    for needs_wf in ["delete", "inspect", "pods", "log", "details"]:
+    for needs_wf in [
+        "delete",
+        "inspect",
+        "pods",
+        "logs",
+        "rawlogs",
+        "details",
+        "command",
+        "wait",
+    ]:
         if needs_wf == op:
             if not args.workflow_id:
                 raise ValueError(
@@ -80,34 +150,63 @@ def standalone():
     if op == "details":
         if not args.pod_id:
             raise ValueError("Operation '{}' requires pod ID".format(op))
+    if op == "submission" and not args.submission_id:
+        raise ValueError("Operation '{}' requires submission ID".format(op))
     if op == "create" and not args.json:
         raise ValueError("Operation '{}' requires input JSON".format(op))
     client = Client(api_url=args.url, post_json_file=args.json)
     if args.debug:
         client.log.setLevel(logging.DEBUG)
     if op == "list":
-        client.list()
+        filters = {
+            "phases": args.phase.split(",") if args.phase else None,
+            "fields": args.fields.split(",") if args.fields else None,
+        }
+        if args.page_size:
+            client.list_all(page_size=args.page_size, **filters)
+        else:
+            client.list(**filters)
     elif op == "create":
-        client.new()
+        if args.batch:
+            client.new_batch()
+        else:
+            client.new()
     elif op == "version":
         client.version()
+    elif op == "submission":
+        client.submission(args.submission_id)
     wf = args.workflow_id
+    log_opts = {
+        "follow": args.follow,
+        "tail_lines": args.tail,
+        "since_seconds": args.since,
+        "limit_bytes": args.limit_bytes,
+    }
     if op == "delete":
         client.delete(wf)
     elif op == "inspect":
-        client.inspect(wf)
+        client.inspect(wf, full=args.full)
     elif op == "logs":
-        client.logs(wf)
+        client.logs(wf, **log_opts)
     elif op == "pods":
         client.pods(wf)
     elif op == "details":
         client.details(wf, args.pod_id)
+    elif op == "command":
+        client.command(wf)
+    elif op == "wait":
+        client.wait(wf)
     elif op == "rawlogs":
-        client.logs(wf)
-        # The output is not JSON: output it directly and do not call
-        #  show_response()
-        for entry in client.last_response:
-            print(entry["logs"])
+        # The output is not JSON: output it directly, line by line as it
+        #  arrives, and do not call show_response()
+        for entry in client.stream_logs(wf, **log_opts):
+            if "error" in entry:
+                print(
+                    "[{}: {}]".format(entry["name"], entry["error"]),
+                    file=sys.stderr,
+                )
+                continue
+            print(entry["line"], flush=True)
         return
     client.show_response()
 
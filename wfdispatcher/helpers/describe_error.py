@@ -0,0 +1,18 @@
+from kubernetes.client.rest import ApiException
+
+
+def describe_error(exc):
+    """Return a JSON-ready dict describing why a workflow could not be
+    created, fit to show the user: the status and reason of a Kubernetes
+    API error, without its headers and body, or the description of a
+    Falcon HTTP error.  Anything else is reported only by type, since its
+    text may carry internals.
+    """
+    if isinstance(exc, ApiException):
+        return {"error": exc.reason, "status": exc.status}
+    description = getattr(exc, "description", None)
+    if description:
+        return {"error": description}
+    return {
+        "error": "Workflow creation failed ({})".format(type(exc).__name__)
+    }
@@ -1,5 +1,5 @@
 import falcon
-from eliot import start_action
+from ..objects.actionlog import start_action
 
 
 def extract_access_token_from_req(req, hdr_name):
@@ -10,13 +10,15 @@ def extract_access_token_from_req(req, hdr_name):
         if auth_hdr is None:
             errstr = "Auth token required as header " + "'{}'".format(hdr_name)
             raise falcon.HTTPUnauthorized(
-                "Auth token required", errstr, challenges
+                title="Auth token required",
+                description=errstr,
+                challenges=challenges,
             )
         if auth_hdr.split()[0].lower() != "bearer":
             raise falcon.HTTPUnauthorized(
-                "Incorrect token format",
-                'Auth header must be "bearer".',
-                challenges,
+                title="Incorrect token format",
+                description='Auth header must be "bearer".',
+                challenges=challenges,
             )
         token = auth_hdr.split()[1]
         return token
@@ -1,4 +1,4 @@
-from eliot import log_call
+from ..objects.actionlog import log_call
 from .extract_user_from_req import extract_user_from_req
 
 
@@ -1,5 +1,5 @@
 import falcon
-from eliot import start_action
+from ..objects.actionlog import start_action
 from rubin_jupyter_utils.helpers import (
     get_execution_namespace,
     parse_access_token,
@@ -9,22 +9,25 @@ from .extract_access_token_from_req import extract_access_token_from_req
 from ..user.user import User
 
 
-def extract_user_from_req(req, hdr_name, claim_fld):
+def extract_user_from_req(req, hdr_name, claim_fld, claims_cache=None):
     with start_action(action_type="extract_user_from_req"):
         token = extract_access_token_from_req(req, hdr_name)
-        try:
-            claims = parse_access_token(token=token)
-        except (RuntimeError, KeyError) as exc:
-            raise falcon.HTTPForbidden(
-                "Failed to verify JWT claims: {}".format(exc)
-            )
+        claims = None
+        if claims_cache:
+            claims = claims_cache.get(token)
+        if not claims:
+            try:
+                claims = parse_access_token(token=token)
+            except (RuntimeError, KeyError) as exc:
+                raise falcon.HTTPForbidden(
+                    title="Failed to verify JWT claims: {}".format(exc)
+                )
+            if claims_cache:
+                claims_cache.put(token, claims)
         username = claims[claim_fld]
         if not username:
-            raise falcon.HTTPUnprocessableEntity(
-                "Could not determine username from claim field {}!".format(
-                    claim_fld
-                )
-            )
+            estr = "Could not determine username from claim field {}!"
+            raise falcon.HTTPUnprocessableEntity(title=estr.format(claim_fld))
         username = username.lower()
         if "@" in username:
             # Process as if email and use localpart equivalent
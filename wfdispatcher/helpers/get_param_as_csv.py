@@ -0,0 +1,13 @@
+def get_param_as_csv(req, name, default=None):
+    """Return the query parameter as a list of comma-separated values,
+    which may also be given as repeated parameters, or 'default' if it
+    is absent.
+
+    Falcon only splits parameter values on commas when the app's
+    'auto_parse_qs_csv' option is on, and we leave that off, since label
+    selectors contain commas too.
+    """
+    values = req.get_param_as_list(name)
+    if values is None:
+        return default
+    return [x.strip() for v in values for x in v.split(",") if x.strip()]
@@ -0,0 +1,25 @@
+import hashlib
+import falcon
+
+
+def not_modified(req, resp, version):
+    """Set a weak ETag on the response for the representation the request
+    asks for of an object (or list) at resourceVersion 'version'.  If the
+    request's If-None-Match already names that ETag, make the response a
+    304 Not Modified and return True.
+
+    The query string is folded into the ETag, since it selects the
+    representation.  With no version, nothing is done.
+    """
+    if not version:
+        return False
+    tag = str(version)
+    if req.query_string:
+        digest = hashlib.sha1(req.query_string.encode("utf-8"))
+        tag = "{}-{}".format(tag, digest.hexdigest()[:12])
+    resp.etag = 'W/"{}"'.format(tag)
+    inm = req.if_none_match
+    if not inm or not any(x == "*" or x == tag for x in inm):
+        return False
+    resp.status = falcon.HTTP_304
+    return True
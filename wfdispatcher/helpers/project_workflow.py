@@ -0,0 +1,24 @@
+WORKFLOW_FIELDS = {
+    "name": ("metadata", "name"),
+    "namespace": ("metadata", "namespace"),
+    "createdAt": ("metadata", "creationTimestamp"),
+    "labels": ("metadata", "labels"),
+    "phase": ("status", "phase"),
+    "startedAt": ("status", "startedAt"),
+    "finishedAt": ("status", "finishedAt"),
+    "message": ("status", "message"),
+}
+
+
+def project_workflow(wf, fields):
+    """Return a dict holding only the named 'fields' (keys of
+    WORKFLOW_FIELDS) of the workflow 'wf', a JSON dict.  Missing values
+    are None.
+    """
+    rd = {}
+    for fld in fields:
+        val = wf
+        for key in WORKFLOW_FIELDS[fld]:
+            val = (val or {}).get(key)
+        rd[fld] = val
+    return rd
@@ -0,0 +1,24 @@
+import json
+import re
+
+RV_PATTERN = re.compile(rb'"resourceVersion"\s*:\s*"([^"]*)"')
+
+
+def resource_version(obj):
+    """Return the metadata.resourceVersion of a Kubernetes object, given
+    either as a JSON dict or as the raw JSON bytes from the API server,
+    or None if it has none.
+
+    Raw objects are only scanned for "resourceVersion" keys.  If there is
+    exactly one, it is the object's own; if a label, annotation or other
+    key of that name makes the match ambiguous, the object is parsed.
+    """
+    if isinstance(obj, bytes):
+        matches = RV_PATTERN.findall(obj)
+        if len(matches) > 1:
+            obj = json.loads(obj)
+        elif matches:
+            return matches[0].decode("utf-8")
+        else:
+            return None
+    return (obj.get("metadata") or {}).get("resourceVersion")
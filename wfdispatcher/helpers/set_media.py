@@ -0,0 +1,7 @@
+def set_media(resp, media):
+    """Set the response media, unless it is None because the response has
+    been made a 304 Not Modified, which must have neither a body nor a
+    Content-Type.
+    """
+    if media is not None:
+        resp.media = media
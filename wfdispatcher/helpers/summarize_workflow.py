@@ -0,0 +1,63 @@
+from .project_workflow import project_workflow, WORKFLOW_FIELDS
+from .workflow_delta import workflow_delta
+
+FAILED_PHASES = ["Failed", "Error"]
+MAX_FAILED_NODES = 100
+
+
+def summarize_workflow(wf, state=None):
+    """Summarize a workflow (as a JSON dict): its WORKFLOW_FIELDS plus
+    resourceVersion, progress, the number of nodes in each phase and the
+    failed nodes (at most MAX_FAILED_NODES of them).  Return a tuple of
+    (summary, new_state).
+
+    'state' is the value returned by the previous call for the same
+    workflow (or None for the first); given it, the node counts are
+    updated from the nodes that changed rather than rebuilt.
+    """
+    if state is None:
+        counts = {}
+        failed = {}
+        old_nodes = {}
+    else:
+        counts = dict(state["counts"])
+        failed = dict(state["failed"])
+        old_nodes = state["nodes"]
+    event, new_state = workflow_delta(wf, state)
+    nodes = (wf.get("status") or {}).get("nodes") or {}
+    changed = event["nodes"] if event else {}
+    gone = [x for x in old_nodes if x not in new_state["nodes"]]
+    for node_id in list(changed) + gone:
+        if node_id in old_nodes:
+            _count(counts, old_nodes[node_id][0], -1)
+        failed.pop(node_id, None)
+        node = nodes.get(node_id)
+        if node is None:
+            continue
+        phase = node.get("phase")
+        _count(counts, phase, 1)
+        if phase in FAILED_PHASES:
+            failed[node_id] = {
+                "id": node_id,
+                "name": node.get("name"),
+                "type": node.get("type"),
+                "phase": phase,
+                "message": node.get("message"),
+                "startedAt": node.get("startedAt"),
+                "finishedAt": node.get("finishedAt"),
+            }
+    new_state["counts"] = counts
+    new_state["failed"] = failed
+    summary = project_workflow(wf, WORKFLOW_FIELDS)
+    summary["resourceVersion"] = wf["metadata"].get("resourceVersion")
+    summary["progress"] = (wf.get("status") or {}).get("progress")
+    summary["nodeCounts"] = counts
+    summary["failedNodes"] = list(failed.values())[:MAX_FAILED_NODES]
+    return summary, new_state
+
+
+def _count(counts, phase, delta):
+    phase = phase or "Unknown"
+    counts[phase] = counts.get(phase, 0) + delta
+    if not counts[phase]:
+        del counts[phase]
@@ -0,0 +1,16 @@
+import falcon
+
+
+def want_live_read(req):
+    """Return True if the request asked to bypass the workflow cache with
+    '?consistency=live'.  The default, 'cached', allows a cached read.
+    """
+    consistency = req.get_param("consistency", default="cached").lower()
+    allowable = ["cached", "live"]
+    if consistency not in allowable:
+        raise falcon.HTTPBadRequest(
+            description="'consistency' must be one of '{}'!".format(
+                allowable
+            )
+        )
+    return consistency == "live"
@@ -0,0 +1,34 @@
+TERMINAL_PHASES = ["Succeeded", "Failed", "Error"]
+
+
+def workflow_delta(wf, state=None):
+    """Compare a workflow (as a JSON dict) against 'state', the value
+    returned by the previous call (or None for the first), and return
+    a tuple of (event, new_state).
+
+    The event carries the workflow phase and timings and only those nodes
+    whose phase or message changed; it is None if nothing changed.
+    """
+    if state is None:
+        state = {"phase": None, "nodes": {}}
+    status = wf.get("status") or {}
+    phase = status.get("phase")
+    nodes = {}
+    changed = {}
+    for node_id, node in (status.get("nodes") or {}).items():
+        ns = (node.get("phase"), node.get("message"))
+        nodes[node_id] = ns
+        if state["nodes"].get(node_id) != ns:
+            changed[node_id] = {"phase": ns[0], "message": ns[1]}
+    new_state = {"phase": phase, "nodes": nodes}
+    if phase == state["phase"] and not changed:
+        return None, new_state
+    event = {
+        "name": wf["metadata"]["name"],
+        "phase": phase,
+        "startedAt": status.get("startedAt"),
+        "finishedAt": status.get("finishedAt"),
+        "message": status.get("message"),
+        "nodes": changed,
+    }
+    return event, new_state
@@ -0,0 +1,157 @@
+"""Drop-in replacements for eliot's start_action() and log_call() that
+obey a process-wide ActionPolicy, so that in production eliot actions
+can be sampled, switched off per action type, or logged without their
+(possibly large) arguments and results.
+"""
+import contextlib
+import contextvars
+import functools
+import random
+import eliot
+
+# Whether the outermost action in the current context was sampled, or None
+#  outside any action.
+_SAMPLED = contextvars.ContextVar("wfdispatcher_action_sampled", default=None)
+
+
+class ActionPolicy(object):
+    """Decide which eliot actions are logged, and how much of them.
+
+    'mode' is one of:
+      full: log actions with their fields, arguments and results (the
+            default, and the historical behavior)
+      lean: log actions, but without fields, arguments or results
+      off: log no actions
+    'sample_rate' (0.0 to 1.0) is the fraction of actions logged, and
+    'rates' maps action types to their own sample rates, overriding it;
+    a rate of 0 turns that action type off.
+
+    Only top-level actions are sampled.  Actions within one follow its
+    decision, so that each task is logged whole or not at all; the one
+    exception is an action type turned off, which is left out of a
+    logged task (its own children are logged under its parent).
+    """
+
+    modes = ["full", "lean", "off"]
+
+    def __init__(self, *args, **kwargs):
+        self.configure(**kwargs)
+
+    def configure(self, mode="full", sample_rate=1.0, rates=None):
+        if mode not in self.modes:
+            raise ValueError(
+                "Log mode '{}' not one of '{}'!".format(mode, self.modes)
+            )
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.rates = rates or {}
+
+    @property
+    def include_payloads(self):
+        return self.mode == "full"
+
+    def sampled(self, action_type):
+        """Return whether to log an action of 'action_type' started now.
+        """
+        if self.mode == "off":
+            return False
+        rate = self.rates.get(action_type, self.sample_rate)
+        enclosing = _SAMPLED.get()
+        if enclosing is not None:
+            return enclosing and rate > 0
+        if rate >= 1.0:
+            return True
+        return rate > 0 and random.random() < rate
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        pd = {
+            "mode": self.mode,
+            "sample_rate": self.sample_rate,
+            "rates": self.rates,
+        }
+        return pd
+
+
+POLICY = ActionPolicy()
+
+
+def start_action(action_type, **fields):
+    """Like eliot.start_action(), but returns a do-nothing context
+    manager if POLICY does not sample this action.
+    """
+    sampled = POLICY.sampled(action_type)
+    action = None
+    if sampled:
+        if not POLICY.include_payloads:
+            fields = {}
+        action = eliot.start_action(action_type=action_type, **fields)
+    if _SAMPLED.get() is not None:
+        return action or contextlib.nullcontext()
+    return _top_level(sampled, action)
+
+
+@contextlib.contextmanager
+def _top_level(sampled, action):
+    """Run a top-level action, or nothing, with its sampling decision
+    recorded for the actions within it.
+    """
+    token = _SAMPLED.set(sampled)
+    try:
+        if action is None:
+            yield None
+        else:
+            with action as act:
+                yield act
+    finally:
+        _SAMPLED.reset(token)
+
+
+def log_call(
+    wrapped_function=None,
+    action_type=None,
+    include_args=None,
+    include_result=True,
+):
+    """Like eliot.log_call(), but consults POLICY on each call: unsampled
+    calls go straight to the function (as, if the call is top-level, do
+    the actions within it), and in 'lean' mode arguments and results are
+    not logged.
+    """
+    if wrapped_function is None:
+        return functools.partial(
+            log_call,
+            action_type=action_type,
+            include_args=include_args,
+            include_result=include_result,
+        )
+    if action_type is None:
+        action_type = "{}.{}".format(
+            wrapped_function.__module__, wrapped_function.__qualname__
+        )
+    full = eliot.log_call(
+        wrapped_function,
+        action_type=action_type,
+        include_args=include_args,
+        include_result=include_result,
+    )
+    lean = eliot.log_call(
+        wrapped_function,
+        action_type=action_type,
+        include_args=[],
+        include_result=False,
+    )
+
+    @functools.wraps(wrapped_function)
+    def logged(*args, **kwargs):
+        sampled = POLICY.sampled(action_type)
+        call = wrapped_function
+        if sampled:
+            call = full if POLICY.include_payloads else lean
+        if _SAMPLED.get() is not None:
+            return call(*args, **kwargs)
+        with _top_level(sampled, None):
+            return call(*args, **kwargs)
+
+    return logged
@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+import argo
+from argo.workflows.client import ApiClient as ArgoApiClient
+from argo.workflows.client import Configuration as ArgoConfiguration
+from argo.workflows.client import V1alpha1Api
+from .actionlog import start_action
+from kubernetes.client import (
+    ApiClient,
+    Configuration,
+    CoreV1Api,
+    CustomObjectsApi,
+    RbacAuthorizationV1Api,
+)
+from kubernetes.config.config_exception import ConfigException
+from kubernetes.config import load_kube_config as load_ckube_config
+from kubernetes.config import load_incluster_config as load_cincluster_config
+from rubin_jupyter_utils.helpers import Singleton
+from rubin_jupyter_utils.hub import LoggableChild
+from rubin_jupyter_utils.hub.rubinmgr.apimanager import RubinAPIManager
+from .metrics import instrument
+
+SA_TOKEN_FILE = "/var/run/secrets/kubernetes.io/serviceaccount/token"
+
+
+class KubernetesClientPool(LoggableChild):
+    """Process-wide registry of Kubernetes core and Argo Workflow API
+    clients.
+
+    Configuration is loaded once, and each API object is built around a
+    single ApiClient, so its urllib3 connection pool (and the keep-alive
+    TLS connections in it) is shared by every request the server handles.
+    Every API call is timed for the metrics endpoint.
+    If we are running in-cluster, the service account token file is
+    checked periodically, and the clients are rebuilt when it rotates.
+    If 'kube_config' names a kubeconfig file, it is used instead, and
+    in-cluster configuration is not tried.
+
+    The pooled clients are also installed in the RubinAPIManager
+    singleton, which the Rubin namespace and quota managers use to
+    provision user namespaces, so that provisioning goes to the same
+    cluster as everything else.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_maxsize = kwargs.pop("pool_maxsize", 32)
+        self.retries = kwargs.pop("retries", 3)
+        self.token_file = kwargs.pop("token_file", SA_TOKEN_FILE)
+        self.token_check_interval = kwargs.pop("token_check_interval", 60)
+        self.kube_config = kwargs.pop("kube_config", None)
+        self.in_cluster = False
+        self.core_api = None
+        self.custom_api = None
+        self.rbac_api = None
+        self.wf_api = None
+        self._lock = threading.Lock()
+        self._token_mtime = None
+        self._last_check = 0.0
+        self.reload()
+
+    def reload(self):
+        """(Re)load configuration and build fresh API clients.
+        """
+        with start_action(action_type="client_pool/reload"):
+            with self._lock:
+                self._load_configs()
+                core_cfg = self._tune(Configuration.get_default_copy())
+                wf_cfg = self._tune(ArgoConfiguration.get_default_copy())
+                core_client = ApiClient(configuration=core_cfg)
+                self.core_api = instrument(
+                    CoreV1Api(api_client=core_client), "core"
+                )
+                self.custom_api = instrument(
+                    CustomObjectsApi(api_client=core_client), "custom"
+                )
+                self.rbac_api = instrument(
+                    RbacAuthorizationV1Api(api_client=core_client), "rbac"
+                )
+                self.wf_api = instrument(
+                    V1alpha1Api(
+                        api_client=ArgoApiClient(configuration=wf_cfg)
+                    ),
+                    "workflow",
+                )
+                self._install_api_manager()
+                self._token_mtime = self._get_token_mtime()
+                self._last_check = time.monotonic()
+                self.log.debug(
+                    "API clients built with pool size {}.".format(
+                        self.pool_maxsize
+                    )
+                )
+
+    def _load_configs(self):
+        self.log.debug("Loading K8s core and workflow config.")
+        if self.kube_config:
+            load_ckube_config(config_file=self.kube_config)
+            argo.workflows.config.load_kube_config(
+                config_file=self.kube_config
+            )
+            self.in_cluster = False
+            self.log.debug(
+                "K8s config loaded from {}.".format(self.kube_config)
+            )
+            return
+        try:
+            load_cincluster_config()
+            argo.workflows.config.load_incluster_config()
+            self.in_cluster = True
+            self.log.debug("K8s in-cluster config loaded.")
+        except ConfigException:
+            self.log.warning("In-cluster config failed! Falling back.")
+            load_ckube_config()  # Raise if this one fails.
+            argo.workflows.config.load_kube_config()
+            self.in_cluster = False
+            self.log.debug("K8s config loaded.")
+
+    def _install_api_manager(self):
+        """Make the RubinAPIManager singleton hand out our clients.  Its
+        constructor loads the default kube configuration, whatever
+        'kube_config' says, so it is built here without running it.
+        """
+        mgr = Singleton._instances.get(RubinAPIManager)
+        if mgr is None:
+            mgr = RubinAPIManager.__new__(RubinAPIManager)
+            LoggableChild.__init__(mgr, parent=self)
+            Singleton._instances[RubinAPIManager] = mgr
+        mgr.api = self.core_api
+        mgr.rbac_api = self.rbac_api
+
+    def _tune(self, cfg):
+        cfg.connection_pool_maxsize = self.pool_maxsize
+        cfg.retries = self.retries
+        return cfg
+
+    def _get_token_mtime(self):
+        if not self.in_cluster:
+            return None
+        try:
+            return os.stat(self.token_file).st_mtime
+        except OSError:
+            return None
+
+    def _check_token(self):
+        """Rebuild the clients if the service account token has changed
+        since we last loaded it.  This is rate-limited so that the stat()
+        does not happen on every request.
+        """
+        if not self.in_cluster:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.token_check_interval:
+            return
+        self._last_check = now
+        mtime = self._get_token_mtime()
+        if mtime is not None and mtime != self._token_mtime:
+            self.log.info("Service account token rotated; reloading.")
+            self.reload()
+
+    def get_core_api(self):
+        self._check_token()
+        return self.core_api
+
+    def get_custom_api(self):
+        self._check_token()
+        return self.custom_api
+
+    def get_wf_api(self):
+        self._check_token()
+        return self.wf_api
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        pd = {
+            "parent": str(self.parent),
+            "pool_maxsize": self.pool_maxsize,
+            "retries": self.retries,
+            "in_cluster": self.in_cluster,
+            "core_api": str(self.core_api),
+            "rbac_api": str(self.rbac_api),
+            "wf_api": str(self.wf_api),
+        }
+        return pd
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+from datetime import timezone
+from .actionlog import start_action
+from kubernetes.client.rest import ApiException
+from rubin_jupyter_utils.hub import LoggableChild
+from .workflowcache import WF_GROUP, WF_VERSION, WF_PLURAL
+
+CM_LABEL = "lsst.org/wf-command"
+CM_USED_ANNOTATION = "lsst.org/wf-command-used"
+
+
+class ConfigMapCache(LoggableChild):
+    """Record of which command configmaps are known to exist, per
+    namespace, and collector of the ones no workflow uses any more.
+
+    Command configmaps are named by a digest of the command, so
+    resubmitting the same command reuses one.  Once this server has
+    created a configmap, or stamped its reuse on the configmap's
+    CM_USED_ANNOTATION annotation, it is known to exist for the next
+    'ttl' seconds, and creating it again is skipped.  Knowing it does not
+    extend that time: after 'ttl' seconds the next use goes back to the
+    API.  'ttl' must be less than 'gc_min_age', so that no collector, on
+    this server or another, deletes a configmap this server believes
+    in.
+
+    Every command configmap carries the CM_LABEL label.  If
+    'gc_interval' is nonzero (by default it is zero), start() runs a
+    background thread that periodically deletes labelled configmaps that
+    no workflow in their namespace mounts.  Configmaps created or used
+    in the last 'gc_min_age' seconds, by this server or (as the
+    annotation shows) any other, are left alone, so that one is not
+    deleted between its creation and that of the workflow that mounts
+    it.  This requires that the service account can list configmaps and
+    workflows cluster-wide.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client_pool = kwargs.pop("client_pool", None)
+        if not self.client_pool:
+            raise RuntimeError("'client_pool' parameter must be provided!")
+        self.ttl = kwargs.pop("ttl", 300)
+        self.gc_interval = kwargs.pop("gc_interval", 0)
+        self.gc_min_age = kwargs.pop("gc_min_age", 3600)
+        if self.ttl >= self.gc_min_age:
+            raise ValueError(
+                "Configmap TTL {} must be less than GC minimum age {}".format(
+                    self.ttl, self.gc_min_age
+                )
+            )
+        self.deleted = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def known(self, namespace, name):
+        """Return True if the configmap was created or marked used by
+        this server in the last 'ttl' seconds.
+        """
+        now = time.time()
+        with self._lock:
+            last = self._entries.get(namespace, {}).get(name)
+            if last is None or last + self.ttl < now:
+                self.misses += 1
+                return False
+            self.hits += 1
+            return True
+
+    def mark(self, namespace, name):
+        with self._lock:
+            self._entries.setdefault(namespace, {})[name] = time.time()
+
+    def forget(self, namespace, name):
+        with self._lock:
+            self._entries.get(namespace, {}).pop(name, None)
+
+    def forget_namespace(self, namespace):
+        with self._lock:
+            self._entries.pop(namespace, None)
+
+    def _recently_used(self, namespace, name, now):
+        with self._lock:
+            last = self._entries.get(namespace, {}).get(name)
+        return last is not None and last + self.gc_min_age > now
+
+    def start(self):
+        if self._thread or not self.gc_interval:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="configmap-gc", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.gc_interval):
+            try:
+                self.collect()
+            except Exception as exc:
+                self.log.exception(
+                    "Configmap collection failed: {}".format(exc)
+                )
+
+    def collect(self):
+        """Delete every labelled command configmap, old enough and not
+        recently used, that no workflow in its namespace mounts.  Return
+        the number deleted.
+        """
+        with start_action(action_type="configmap_cache/collect"):
+            now = time.time()
+            api = self.client_pool.get_core_api()
+            cms = api.list_config_map_for_all_namespaces(
+                label_selector=CM_LABEL
+            )
+            candidates = {}
+            for cm in cms.items:
+                md = cm.metadata
+                created = md.creation_timestamp
+                if created:
+                    if created.tzinfo is None:
+                        created = created.replace(tzinfo=timezone.utc)
+                    if created.timestamp() + self.gc_min_age > now:
+                        continue
+                if self._recently_used(md.namespace, md.name, now):
+                    continue
+                used = (md.annotations or {}).get(CM_USED_ANNOTATION)
+                if used and float(used) + self.gc_min_age > now:
+                    continue
+                candidates.setdefault(md.namespace, []).append(md.name)
+            count = 0
+            for namespace, names in candidates.items():
+                used = self._referenced(namespace)
+                for name in names:
+                    if name in used:
+                        continue
+                    self.forget(namespace, name)
+                    try:
+                        api.delete_namespaced_config_map(name, namespace)
+                        count += 1
+                    except ApiException as exc:
+                        if exc.status != 404:
+                            raise
+            self.deleted += count
+            self.log.info(
+                "Deleted {} unreferenced command configmaps.".format(count)
+            )
+            return count
+
+    def _referenced(self, namespace):
+        """Return the set of configmap names mounted by workflows in the
+        namespace.
+        """
+        api = self.client_pool.get_custom_api()
+        resp = api.list_namespaced_custom_object(
+            WF_GROUP, WF_VERSION, namespace, WF_PLURAL, _preload_content=False
+        )
+        used = set()
+        for wf in json.loads(resp.data).get("items") or []:
+            for vol in (wf.get("spec") or {}).get("volumes") or []:
+                cm = vol.get("configMap")
+                if cm and cm.get("name"):
+                    used.add(cm["name"])
+        return used
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        cd = {
+            "parent": str(self.parent),
+            "ttl": self.ttl,
+            "gc_interval": self.gc_interval,
+            "gc_min_age": self.gc_min_age,
+            "deleted": self.deleted,
+            "hits": self.hits,
+            "misses": self.misses,
+            "namespaces": {k: len(v) for k, v in self._entries.items()},
+        }
+        return cd
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from .actionlog import start_action
+from rubin_jupyter_utils.hub import LoggableChild, RubinMiddleManager
+from rubin_jupyter_utils.config import RubinConfig
+from rubin_jupyter_utils.helpers import str_true
+from ..user.user import User
+
+
+class ConfigSnapshot(LoggableChild):
+    """Precomputed, non-user-specific configuration for workflow
+    submission: the size list and sizemap, the volume and mount lists, the
+    Dask volume description, and the static part of the pod environment.
+
+    It is built once at startup.  The volume definition and resource map
+    files are watched (by mtime, checked at most every 'check_interval'
+    seconds) and the snapshot is rebuilt when either changes.  Each
+    rebuild increments 'generation', which callers can use as a cache key.
+    'config_overrides', a dict of RubinConfig attribute names and values,
+    replaces what the Rubin configuration would otherwise read from the
+    environment (for instance, the paths of the files above).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.check_interval = kwargs.pop("check_interval", 30)
+        self.config_overrides = kwargs.pop("config_overrides", None) or {}
+        self.config = None
+        self.generation = 0
+        self.sizelist = []
+        self.sizemap = {}
+        self.volumes = []
+        self.mounts = []
+        self.dask_volume_b64 = None
+        self.static_env = {}
+        self._mtimes = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        with start_action(action_type="config_snapshot/reload"):
+            with self._lock:
+                cfg = self._get_config()
+                # The options form manager wants a user, but only to log
+                #  its name.
+                rm = RubinMiddleManager(
+                    parent=self, config=cfg, user=User(name="wfdispatcher")
+                )
+                om = rm.optionsform_mgr
+                om._make_sizemap()
+                em = rm.env_mgr
+                em.create_pod_env()
+                vm = rm.volume_mgr
+                vm.make_volumes_from_config()
+                env = {}
+                env.update(em.get_env())
+                env["DEBUG"] = str_true(cfg.debug)
+                if cfg.lab_no_sudo:
+                    env["NO_SUDO"] = "TRUE"
+                env["NONINTERACTIVE"] = "TRUE"
+                dask_volume_b64 = vm.get_dask_volume_b64()
+                env["DASK_VOLUME_B64"] = dask_volume_b64
+                self.config = cfg
+                self.sizelist = list(cfg.form_sizelist)
+                self.sizemap = om.sizemap
+                self.volumes = list(vm.k8s_volumes)
+                self.mounts = list(vm.k8s_vol_mts)
+                self.dask_volume_b64 = dask_volume_b64
+                self.static_env = env
+                self._mtimes = self._get_mtimes()
+                self._last_check = time.monotonic()
+                self.generation += 1
+                self.log.info(
+                    "Configuration snapshot generation {} built.".format(
+                        self.generation
+                    )
+                )
+
+    def _get_config(self):
+        cfg = RubinConfig()
+        # RubinConfig is a singleton that reads the environment only when
+        #  first made, so the overrides are set on it directly.
+        for attr, val in self.config_overrides.items():
+            setattr(cfg, attr, val)
+        return cfg
+
+    def _watched_files(self):
+        cfg = self.config or self._get_config()
+        return [cfg.volume_definition_file, cfg.resource_map]
+
+    def _get_mtimes(self):
+        mtimes = []
+        for fn in self._watched_files():
+            try:
+                mtimes.append(os.stat(fn).st_mtime)
+            except (OSError, TypeError):
+                mtimes.append(None)
+        return mtimes
+
+    def refresh(self):
+        """Rebuild the snapshot if any watched file has changed.  Cheap
+        enough to call on every request.
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        if self._get_mtimes() != self._mtimes:
+            self.log.info("Configuration files changed; reloading.")
+            self.reload()
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        cd = {
+            "parent": str(self.parent),
+            "generation": self.generation,
+            "sizelist": self.sizelist,
+            "sizemap": self.sizemap,
+            "volumes": [str(x) for x in self.volumes],
+            "mounts": [str(x) for x in self.mounts],
+        }
+        return cd
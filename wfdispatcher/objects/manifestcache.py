@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+
+
+class ManifestCache(object):
+    """Bounded LRU cache of prebuilt workflow templates: the container
+    environment, resources, volumes, mounts and security context, which
+    are the same for every workflow a user submits with a given image
+    and size.
+
+    Callers key entries on everything the template depends on, including
+    the ConfigSnapshot generation, so a configuration reload never serves
+    a stale template.  Templates are shared between requests and must
+    not be modified.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.maxsize = kwargs.pop("maxsize", 256)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        if not total:
+            return 0.0
+        return self.hits / total
+
+    def get(self, key):
+        """Return the cached template for the key, or None.
+        """
+        with self._lock:
+            tmpl = self._entries.get(key)
+            if tmpl is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return tmpl
+
+    def put(self, key, tmpl):
+        with self._lock:
+            self._entries[key] = tmpl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        cd = {
+            "maxsize": self.maxsize,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+        return cd
@@ -0,0 +1,115 @@
+"""Prometheus metrics for the dispatcher.  These live in the default
+registry, which the server's /metrics route exposes.
+"""
+import functools
+import time
+from kubernetes.client.rest import ApiException
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+REQUESTS = Counter(
+    "wfdispatcher_requests",
+    "HTTP requests handled, by route, method and status",
+    ["route", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "wfdispatcher_request_seconds",
+    "HTTP request latency, by route and method",
+    ["route", "method"],
+)
+IN_FLIGHT = Gauge(
+    "wfdispatcher_requests_in_flight", "HTTP requests being handled"
+)
+API_LATENCY = Histogram(
+    "wfdispatcher_api_call_seconds",
+    "Kubernetes/Argo API call latency, until response headers arrive",
+    ["api", "call"],
+)
+API_ERRORS = Counter(
+    "wfdispatcher_api_call_errors",
+    "Kubernetes/Argo API calls that failed, by HTTP status",
+    ["api", "call", "status"],
+)
+AUTH_LATENCY = Histogram(
+    "wfdispatcher_auth_seconds", "Time to authenticate a request"
+)
+PROVISION_LATENCY = Histogram(
+    "wfdispatcher_provision_seconds",
+    "Time to provision a user namespace, when not cached",
+)
+
+
+def instrument(api, name):
+    """Wrap the public methods of a Kubernetes or Argo API object so that
+    each call is timed in API_LATENCY (and counted in API_ERRORS if it
+    fails).  'name' labels the API ('core', 'custom', 'rbac',
+    'workflow').
+    """
+    return InstrumentedApi(api, name)
+
+
+class InstrumentedApi(object):
+    def __init__(self, api, name):
+        self._api = api
+        self._name = name
+
+    def __getattr__(self, attr):
+        val = getattr(self._api, attr)
+        if attr.startswith("_") or not callable(val):
+            return val
+        api = self._name
+
+        # functools.wraps() keeps the docstring, which kubernetes.watch
+        #  reads to find the return type.
+        @functools.wraps(val)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return val(*args, **kwargs)
+            except ApiException as exc:
+                API_ERRORS.labels(api, attr, str(exc.status)).inc()
+                raise
+            except Exception:
+                API_ERRORS.labels(api, attr, "none").inc()
+                raise
+            finally:
+                API_LATENCY.labels(api, attr).observe(
+                    time.perf_counter() - start
+                )
+
+        return timed
+
+
+class CacheCollector(object):
+    """Report hits, misses and hit ratio for each tracked cache.  A cache
+    is anything with 'hits' and 'misses' attributes.
+    """
+
+    def __init__(self):
+        self.caches = {}
+
+    def track(self, name, cache):
+        self.caches[name] = cache
+
+    def collect(self):
+        hits = CounterMetricFamily(
+            "wfdispatcher_cache_hits", "Cache hits", labels=["cache"]
+        )
+        misses = CounterMetricFamily(
+            "wfdispatcher_cache_misses", "Cache misses", labels=["cache"]
+        )
+        ratio = GaugeMetricFamily(
+            "wfdispatcher_cache_hit_ratio",
+            "Cache hits over lookups since startup",
+            labels=["cache"],
+        )
+        for name, cache in self.caches.items():
+            total = cache.hits + cache.misses
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+            ratio.add_metric([name], cache.hits / total if total else 0.0)
+        return [hits, misses, ratio]
+
+
+CACHES = CacheCollector()
+REGISTRY.register(CACHES)
@@ -0,0 +1,64 @@
+import time
+from .actionlog import start_action
+from kubernetes.client.rest import ApiException
+from rubin_jupyter_utils.hub import LoggableChild
+
+
+class NamespaceCache(LoggableChild):
+    """TTL cache of whether user namespaces exist.
+
+    A miss costs a single read_namespace() call.  Absent namespaces are
+    cached too, but for a shorter time, since they may be created out from
+    under us (e.g. when the user spawns a lab).  submit_workflow() marks
+    the namespace present once it has ensured it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client_pool = kwargs.pop("client_pool", None)
+        if not self.client_pool:
+            raise RuntimeError("'client_pool' parameter must be provided!")
+        self.ttl = kwargs.pop("ttl", 300)
+        self.negative_ttl = kwargs.pop("negative_ttl", 30)
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+    def exists(self, namespace):
+        entry = self._entries.get(namespace)
+        if entry and entry[1] > time.monotonic():
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        with start_action(action_type="namespace_cache/read_namespace"):
+            api = self.client_pool.get_core_api()
+            try:
+                api.read_namespace(namespace)
+                found = True
+            except ApiException as e:
+                if e.status != 404:
+                    raise
+                found = False
+        self._set(namespace, found)
+        return found
+
+    def mark_present(self, namespace):
+        self._set(namespace, True)
+
+    def invalidate(self, namespace):
+        self._entries.pop(namespace, None)
+
+    def _set(self, namespace, found):
+        ttl = self.ttl if found else self.negative_ttl
+        self._entries[namespace] = (found, time.monotonic() + ttl)
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        nd = {
+            "parent": str(self.parent),
+            "ttl": self.ttl,
+            "negative_ttl": self.negative_ttl,
+            "namespaces": {k: v[0] for k, v in self._entries.items()},
+        }
+        return nd
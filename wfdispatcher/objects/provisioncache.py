@@ -0,0 +1,51 @@
+import threading
+import time
+
+
+class ProvisionCache(object):
+    """Record of which user namespaces have recently been provisioned
+    (namespace ensured, quota defined), keyed on namespace and
+    ConfigSnapshot generation, so that a user's next submission can skip
+    the several API calls that takes.
+
+    Entries last 'ttl' seconds.  A caller that finds the namespace or
+    its permissions missing after all should invalidate() it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.ttl = kwargs.pop("ttl", 300)
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def fresh(self, namespace, generation):
+        """Return True if the namespace was provisioned under this
+        configuration generation less than 'ttl' seconds ago.
+        """
+        entry = self._entries.get(namespace)
+        if entry and entry[0] == generation and entry[1] > time.monotonic():
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def mark(self, namespace, generation):
+        with self._lock:
+            expiry = time.monotonic() + self.ttl
+            self._entries[namespace] = (generation, expiry)
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._entries.pop(namespace, None)
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        cd = {
+            "ttl": self.ttl,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+        return cd
@@ -0,0 +1,192 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from .actionlog import start_action
+from ..helpers.describe_error import describe_error
+from rubin_jupyter_utils.hub import LoggableChild
+from .tokenbucket import TokenBucket
+
+
+class QueueFull(Exception):
+    pass
+
+
+class MemoryTicketStore(object):
+    """Keeps submission tickets in memory.  A durable backend (one that
+    lets tickets survive a restart, or be shared by several servers)
+    needs only the same three methods; each ticket is a JSON-ready dict
+    with at least 'id' and 'state'.
+
+    Finished tickets are forgotten after 'retention' seconds.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.retention = kwargs.pop("retention", 3600)
+        self._tickets = {}
+        self._lock = threading.Lock()
+
+    def put(self, ticket):
+        with self._lock:
+            self._expire()
+            self._tickets[ticket["id"]] = dict(ticket)
+
+    def get(self, ticket_id):
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            return dict(ticket) if ticket else None
+
+    def update(self, ticket_id, **fields):
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket:
+                ticket.update(fields)
+
+    def _expire(self):
+        cutoff = time.time() - self.retention
+        for tid in [
+            k
+            for k, v in self._tickets.items()
+            if v.get("finished") and v["finished"] < cutoff
+        ]:
+            del self._tickets[tid]
+
+
+class SubmissionQueue(LoggableChild):
+    """Bounded in-process queue of workflow submissions, drained by a pool
+    of 'workers' threads.
+
+    Each user has their own queue, and the workers take from them in
+    turn, so one user's burst does not hold up everyone else's
+    submissions.  Across all users, submissions start at no more than
+    'rate' per second.  At most 'maxsize' submissions may wait; submit()
+    raises QueueFull beyond that.
+
+    Submissions are tracked as tickets in 'store' (a MemoryTicketStore
+    unless another is given), in state 'queued', 'running', 'succeeded'
+    (with the workflow 'name') or 'failed' (with an 'error').
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.maxsize = kwargs.pop("maxsize", 1000)
+        self.workers = kwargs.pop("workers", 8)
+        self.store = kwargs.pop("store", None) or MemoryTicketStore()
+        self.limiter = TokenBucket(rate=kwargs.pop("rate", 10))
+        self._queues = OrderedDict()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def size(self):
+        return self._size
+
+    def start(self):
+        if self._threads:
+            return
+        for idx in range(self.workers):
+            thread = threading.Thread(
+                target=self._run,
+                name="submission-{}".format(idx),
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def submit(self, user, job):
+        """Queue 'job', a callable that submits a workflow and returns it,
+        on behalf of the user named 'user'.  Return the new ticket.
+        """
+        return self.submit_many(user, [job])[0]
+
+    def submit_many(self, user, jobs):
+        """Queue all of 'jobs', or (raising QueueFull) none of them, and
+        return their tickets in order.
+        """
+        now = time.time()
+        tickets = [
+            {
+                "id": uuid.uuid4().hex,
+                "user": user,
+                "state": "queued",
+                "submitted": now,
+            }
+            for _ in jobs
+        ]
+        with self._cond:
+            if self._size + len(jobs) > self.maxsize:
+                raise QueueFull(
+                    "{} submissions already queued".format(self._size)
+                )
+            queue = self._queues.setdefault(user, deque())
+            for ticket, job in zip(tickets, jobs):
+                self.store.put(ticket)
+                queue.append((ticket["id"], job))
+            self._size += len(jobs)
+            self._cond.notify(len(jobs))
+        return tickets
+
+    def _next(self):
+        with self._cond:
+            while not self._queues and not self._stop.is_set():
+                self._cond.wait()
+            if self._stop.is_set():
+                return None
+            # Take from the user at the front, then send them to the back.
+            user, queue = next(iter(self._queues.items()))
+            item = queue.popleft()
+            self._size -= 1
+            if queue:
+                self._queues.move_to_end(user)
+            else:
+                del self._queues[user]
+            return item
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            if not self.limiter.acquire(stop=self._stop):
+                return
+            ticket_id, job = item
+            self.store.update(ticket_id, state="running", started=time.time())
+            with start_action(action_type="submission_queue/run"):
+                try:
+                    wf = job()
+                    self.store.update(
+                        ticket_id,
+                        state="succeeded",
+                        name=wf.metadata.name,
+                        finished=time.time(),
+                    )
+                except Exception as exc:
+                    self.log.error(
+                        "Submission {} failed: {}".format(ticket_id, exc)
+                    )
+                    self.store.update(
+                        ticket_id,
+                        state="failed",
+                        finished=time.time(),
+                        **describe_error(exc)
+                    )
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        qd = {
+            "parent": str(self.parent),
+            "maxsize": self.maxsize,
+            "workers": self.workers,
+            "rate": self.limiter.rate,
+            "size": self._size,
+            "users": len(self._queues),
+        }
+        return qd
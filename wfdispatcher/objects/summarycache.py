@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+from ..helpers.summarize_workflow import summarize_workflow
+
+
+class SummaryCache(object):
+    """Bounded LRU cache of workflow summaries, keyed on namespace and
+    workflow name.
+
+    A summary is recomputed only when the workflow's resourceVersion
+    changes, and then incrementally, from the nodes that changed since
+    the version last summarized.  Summaries are shared between requests
+    and must not be modified.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.maxsize = kwargs.pop("maxsize", 1024)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        if not total:
+            return 0.0
+        return self.hits / total
+
+    def summarize(self, wf):
+        """Return the summary of 'wf', a workflow JSON dict.
+        """
+        md = wf["metadata"]
+        key = (md.get("namespace"), md["name"])
+        rv = md.get("resourceVersion")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                if rv and entry[0] == rv:
+                    self.hits += 1
+                    return entry[1]
+            self.misses += 1
+        state = entry[2] if entry else None
+        summary, state = summarize_workflow(wf, state)
+        with self._lock:
+            self._entries[key] = (rv, summary, state)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return summary
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        cd = {
+            "maxsize": self.maxsize,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+        return cd
@@ -0,0 +1,46 @@
+import threading
+import time
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket: 'rate' tokens are added per second, up to
+    'burst' (default: one second's worth, and at least one).
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.rate = float(kwargs.pop("rate", 10))
+        self.burst = float(kwargs.pop("burst", max(self.rate, 1)))
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._stamp) * self.rate
+        )
+        self._stamp = now
+
+    def try_acquire(self):
+        """Take a token and return 0.0 if one is available; otherwise
+        return the number of seconds until one will be.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, stop=None):
+        """Block until a token is available and take it.  If 'stop' (a
+        threading.Event) is set while waiting, return False.
+        """
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return True
+            if stop:
+                if stop.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
@@ -0,0 +1,161 @@
+import threading
+from .actionlog import start_action
+from kubernetes.client.rest import ApiException
+from kubernetes.watch import Watch
+from rubin_jupyter_utils.hub import LoggableChild
+
+WF_GROUP = "argoproj.io"
+WF_VERSION = "v1alpha1"
+WF_PLURAL = "workflows"
+
+
+class WorkflowCache(LoggableChild):
+    """In-memory, watch-maintained cache of Argo Workflow objects, indexed
+    by namespace and then by name.
+
+    A background thread lists all workflows in the cluster once, and then
+    follows a watch resumed from the list's resourceVersion.  If the watch
+    expires (410 Gone) or errors out, the thread relists and starts over;
+    the cache is not 'synced' from the failure until the relist is done.
+    Objects are stored as the JSON dicts the API server sends, which is
+    the same form our handlers return to clients.
+
+    This requires that the server's service account can list and watch
+    workflows cluster-wide.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client_pool = kwargs.pop("client_pool", None)
+        if not self.client_pool:
+            raise RuntimeError("'client_pool' parameter must be provided!")
+        self.watch_timeout = kwargs.pop("watch_timeout", 300)
+        self.retry_interval = kwargs.pop("retry_interval", 5)
+        self.resource_version = None
+        self._index = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def synced(self):
+        return self._synced.is_set()
+
+    def start(self):
+        if self._thread:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="workflow-cache", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def wait_for_sync(self, timeout=None):
+        return self._synced.wait(timeout)
+
+    def get(self, namespace, name):
+        """Return the cached workflow, or None if we do not have it.
+        """
+        with self._lock:
+            return self._index.get(namespace, {}).get(name)
+
+    def list(self, namespace):
+        """Return a list of all cached workflows in the namespace.
+        """
+        return self.snapshot(namespace)[1]
+
+    def snapshot(self, namespace):
+        """Return a tuple of (resourceVersion, workflows): the list of all
+        cached workflows in the namespace, and the version of the cache
+        they were read at.
+        """
+        with self._lock:
+            wfs = list(self._index.get(namespace, {}).values())
+            return self.resource_version, wfs
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._relist()
+                self._watch()
+            except ApiException as exc:
+                self._synced.clear()
+                if exc.status == 410:
+                    self.log.info("Workflow watch expired; relisting.")
+                    continue
+                self.log.error("Workflow watch failed: {}".format(exc))
+                self._stop.wait(self.retry_interval)
+            except Exception as exc:
+                self._synced.clear()
+                self.log.error("Workflow watch failed: {}".format(exc))
+                self._stop.wait(self.retry_interval)
+
+    def _relist(self):
+        with start_action(action_type="workflow_cache/relist"):
+            # Whatever we have may be missing events until this is done.
+            self._synced.clear()
+            api = self.client_pool.get_custom_api()
+            wfl = api.list_cluster_custom_object(
+                WF_GROUP, WF_VERSION, WF_PLURAL
+            )
+            index = {}
+            for wf in wfl.get("items", []):
+                md = wf["metadata"]
+                index.setdefault(md["namespace"], {})[md["name"]] = wf
+            with self._lock:
+                self._index = index
+                self.resource_version = wfl["metadata"]["resourceVersion"]
+            self._synced.set()
+            self.log.debug(
+                "Workflow cache synced at resourceVersion {}.".format(
+                    self.resource_version
+                )
+            )
+
+    def _watch(self):
+        while not self._stop.is_set():
+            api = self.client_pool.get_custom_api()
+            w = Watch()
+            for event in w.stream(
+                api.list_cluster_custom_object,
+                WF_GROUP,
+                WF_VERSION,
+                WF_PLURAL,
+                resource_version=self.resource_version,
+                timeout_seconds=self.watch_timeout,
+            ):
+                if self._stop.is_set():
+                    w.stop()
+                    return
+                self._apply(event["type"], event["raw_object"])
+
+    def _apply(self, etype, obj):
+        if etype == "ERROR":
+            raise ApiException(
+                status=obj.get("code"), reason=obj.get("message")
+            )
+        md = obj["metadata"]
+        ns = md["namespace"]
+        name = md["name"]
+        with self._lock:
+            if etype == "DELETED":
+                self._index.get(ns, {}).pop(name, None)
+            else:
+                self._index.setdefault(ns, {})[name] = obj
+            self.resource_version = md["resourceVersion"]
+
+    def dump(self):
+        """Return contents dict for aggregation and pretty-printing.
+        """
+        with self._lock:
+            counts = {ns: len(wfs) for ns, wfs in self._index.items()}
+        cd = {
+            "parent": str(self.parent),
+            "synced": self.synced,
+            "resource_version": self.resource_version,
+            "namespaces": counts,
+        }
+        return cd
@@ -1,16 +1,14 @@
-import argo
 import json
+import logging
 import os
-from argo.workflows.client import V1alpha1Api
-from kubernetes.config.config_exception import ConfigException
-from kubernetes.config import load_kube_config as load_ckube_config
-from kubernetes.config import load_incluster_config as load_cincluster_config
-from eliot import start_action
+import shlex
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .actionlog import start_action
 from kubernetes.client import (
     V1ResourceRequirements,
     V1PodSecurityContext,
     V1Container,
-    CoreV1Api,
     V1ConfigMapVolumeSource,
     V1Volume,
     V1VolumeMount,
@@ -18,16 +16,27 @@ from kubernetes.client import (
     V1ObjectMeta,
 )
 from kubernetes.client.rest import ApiException
+from kubernetes.watch import Watch
 from rubin_jupyter_utils.hub import Loggable, RubinMiddleManager
-from rubin_jupyter_utils.config import RubinConfig
 from rubin_jupyter_utils.helpers import (
     list_digest,
-    str_true,
     assemble_gids,
     get_supplemental_gids,
 )
 from ..helpers.extract_user_from_req import extract_user_from_req
 from ..auth.auth import AuthenticatorMiddleware as AM
+from ..helpers.workflow_delta import workflow_delta, TERMINAL_PHASES
+from .clientpool import KubernetesClientPool
+from .configmapcache import CM_LABEL, CM_USED_ANNOTATION
+from .configsnapshot import ConfigSnapshot
+from .metrics import PROVISION_LATENCY
+from .namespacecache import NamespaceCache
+from .workflowcache import WF_GROUP, WF_VERSION, WF_PLURAL
+
+PHASE_LABEL = "workflows.argoproj.io/phase"
+CMD_CONFIGMAP_ANNOTATION = "lsst.org/wf_cmd_configmap"
+CMD_SUMMARY_ANNOTATION = "lsst.org/wf_cmd_summary"
+CMD_SUMMARY_MAX = 256
 
 
 class RubinWorkflowManager(Loggable):
@@ -36,8 +45,28 @@ class RubinWorkflowManager(Loggable):
     Request (from the requests module), whose authentication header
     (usually 'X-Portal-Authorization') contains a JWT with claims that
     specify the user (in username_claim_field, usually 'uid') used to
-    make the Workflow request.
+    make the Workflow request.  If the authentication middleware has
+    already determined the user and stored it on req.context, that user
+    is used rather than parsing the token again.
+
+    The Kubernetes and Argo API clients are borrowed from a
+    KubernetesClientPool, which should be passed in as 'client_pool'
+    and shared across requests; if it is not, a private one is built.
+
+    If a synced WorkflowCache is passed as 'wf_cache', reads are served
+    from it unless the caller asks for a live read.  Workflows are
+    returned as JSON-ready dicts either way.
 
+    If a ManifestCache is passed as 'manifest_cache', the command-
+    independent part of each workflow is built once per user, image,
+    size and configuration generation and reused.
+
+    If a ProvisionCache is passed as 'provision_cache', provision() does
+    nothing for a user whose namespace was provisioned recently under
+    the current configuration; should a later call then find the
+    namespace gone (404) or forbidden (403, other than for exceeded
+    quota), the entry is dropped and the user is provisioned again before
+    one retry.
     """
 
     def __init__(self, *args, **kwargs):
@@ -48,6 +77,7 @@ class RubinWorkflowManager(Loggable):
         self.cfg_map = None
         self.wf_input = None
         self.user = None
+        self.list_version = None
         req = kwargs.pop("req", None)
         if not req:
             raise RuntimeError("'req' parameter must be provided!")
@@ -57,9 +87,13 @@ class RubinWorkflowManager(Loggable):
         username_claim_field = kwargs.pop("username_claim_field", "uid")
         self.run_as_user = kwargs.pop("run_as_user", 769)
         self.run_as_group = kwargs.pop("run_as_group", 769)
-        self.user = extract_user_from_req(
-            req, auth_header_name, username_claim_field
-        )
+        self.log_workers = kwargs.pop("log_workers", 8)
+        self.log_timeout = kwargs.pop("log_timeout", 30)
+        self.user = req.context.get("user")
+        if not self.user:
+            self.user = extract_user_from_req(
+                req, auth_header_name, username_claim_field
+            )
         if not self.user:
             raise RuntimeError("Could not determine user from request!")
         self.log.debug(
@@ -67,32 +101,30 @@ class RubinWorkflowManager(Loggable):
                 self.user.escaped_name
             )
         )
-        self.core_api = self._get_corev1api()
-        self.wf_api = self._get_wf_api()
+        client_pool = kwargs.pop("client_pool", None)
+        if not client_pool:
+            client_pool = KubernetesClientPool(parent=self)
+        self.client_pool = client_pool
+        self.wf_cache = kwargs.pop("wf_cache", None)
+        ns_cache = kwargs.pop("ns_cache", None)
+        if not ns_cache:
+            ns_cache = NamespaceCache(parent=self, client_pool=client_pool)
+        self.ns_cache = ns_cache
+        config_snapshot = kwargs.pop("config_snapshot", None)
+        if not config_snapshot:
+            config_snapshot = ConfigSnapshot(parent=self)
+        self.config_snapshot = config_snapshot
+        self.manifest_cache = kwargs.pop("manifest_cache", None)
+        self.configmap_cache = kwargs.pop("configmap_cache", None)
+        self.provision_cache = kwargs.pop("provision_cache", None)
 
-    def _get_corev1api(self):
-        self.log.debug("Loading K8s core config.")
-        try:
-            load_cincluster_config()
-            self.log.debug("K8s core in-cluster config loaded.")
-        except ConfigException:
-            self.log.warning("In-cluster core config failed! Falling back.")
-            load_ckube_config()  # Raise if this one fails.
-            self.log.debug("K8s core config loaded.")
-        return CoreV1Api()
-
-    def _get_wf_api(self):
-        self.log.debug("Loading K8s workflow config.")
-        try:
-            argo.workflows.config.load_incluster_config()
-            self.log.debug("K8s workflow in-cluster config loaded.")
-        except ConfigException:
-            self.log.warning(
-                "In-cluster workflow config failed! Falling back."
-            )
-            argo.workflows.config.load_kube_config()
-            self.log.debug("K8s workflow config loaded.")
-        return V1alpha1Api()
+    @property
+    def core_api(self):
+        return self.client_pool.get_core_api()
+
+    @property
+    def wf_api(self):
+        return self.client_pool.get_wf_api()
 
     def define_configmap(self, data):
         """This returns a k8s configmap using the data from the new-workflow
@@ -117,16 +149,17 @@ class RubinWorkflowManager(Loggable):
             self.cmd_vol = k8s_vol
             self.cmd_mt = k8s_mt
             # Now the configmap
-            cm_data = {}
-            cm_data.update(data)
-            del cm_data["image"]
-            del cm_data["size"]
-            jd = json.dumps(data, sort_keys=True, indent=4)
             k8s_configmap = V1ConfigMap(
-                metadata=V1ObjectMeta(name=cm_name),
+                metadata=V1ObjectMeta(
+                    name=cm_name, labels={CM_LABEL: "true"}
+                ),
                 data={"command.json": json.dumps(data)},
             )
-            self.log.debug("Created configmap '{}': {}".format(cm_name, jd))
+            if self.log.isEnabledFor(logging.DEBUG):
+                jd = json.dumps(data, sort_keys=True, indent=4)
+                self.log.debug(
+                    "Created configmap '{}': {}".format(cm_name, jd)
+                )
             self.cfg_map = k8s_configmap
 
     def define_workflow(self, data):
@@ -134,45 +167,77 @@ class RubinWorkflowManager(Loggable):
         It creates a dict which we will pass to a method to create a
         V1Container, which we will then wrap to create an appropriate
         workflow.
+
+        Everything but the command, name and access token depends only on
+        the user, image, size and configuration, so that part is built
+        once by _create_template() and kept in the manifest cache.
         """
         with start_action(action_type="define_workflow"):
-            self.log.debug(
-                "top of define_workflow self.user: {}".format(self.user.dump())
-            )
-            wf_input = {}
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug(
+                    "top of define_workflow self.user: {}".format(
+                        self.user.dump()
+                    )
+                )
             # FIXME Right now we can assume data is of type 'cmd'; we need
             # a little tweaking for 'nb' in that the command will be fixed
             # and the execution parameters will differ.
-            rm = RubinMiddleManager(
-                parent=self,
-                config=RubinConfig(),
-                user=self.user,
-                authenticator=AM(parent=self),
+            snap = self.config_snapshot
+            snap.refresh()
+            username = self.user.name
+            key = (
+                username,
+                self.user.uid,
+                assemble_gids(self.user.claims),
+                data["image"],
+                data["size"],
+                snap.generation,
             )
-            rm.authenticator.set_auth_fields(self.user)
-            # That created a spawner on the authenticator with correct
-            #  fields.
-            rm.spawner = rm.authenticator.spawner
-            cfg = rm.config
-            em = rm.env_mgr
-            vm = rm.volume_mgr
-            om = rm.optionsform_mgr
-            om._make_sizemap()
-            # We use the user we created from the request that created the
-            #  Workflow Manager.
-            self.log.debug(
-                "define_workflow post-middle-manager self.user: {}".format(
-                    self.user.dump()
+            tmpl = None
+            if self.manifest_cache:
+                tmpl = self.manifest_cache.get(key)
+            if tmpl is None:
+                tmpl = self._create_template(data)
+                if self.manifest_cache:
+                    self.manifest_cache.put(key, tmpl)
+            else:
+                self.log.debug("Using cached template for {}".format(key))
+            self.define_configmap(data)
+            cname = data.get("name")
+            if not cname:
+                cname = "wf-{}-{}-{}".format(
+                    username,
+                    data["image"].split(":")[-1].replace("_", "-"),
+                    data["command"][0].split("/")[-1].replace("_", "-"),
                 )
+            parms = {}
+            parms.update(tmpl)
+            parms["name"] = cname
+            parms["command"] = data["command"]
+            parms["env"] = tmpl["env"] + self._d2l(
+                {"ACCESS_TOKEN": self.user.access_token}
             )
+            parms["vols"] = tmpl["vols"] + [self.cmd_vol]
+            parms["vmts"] = tmpl["vmts"] + [self.cmd_mt]
+            manifest = self._create_manifest(parms)
+            self.workflow = manifest
+
+    def _create_template(self, data):
+        """Build the parts of the workflow that do not depend on the
+        command: size, environment (less the access token), volumes,
+        mounts, and security context.
+        """
+        with start_action(action_type="_create_template"):
+            wf_input = {}
+            snap = self.config_snapshot
+            cfg = snap.config
+            # We use the user we created from the request that created the
+            #  Workflow Manager.
             username = self.user.name
             uid = self.user.uid
             claims = self.user.claims
             gids = assemble_gids(claims)
-            em.create_pod_env()
-            em_env = em.get_env()
-            self.log.debug("Environment after em.get_env(): {}".format(em_env))
-            size_map = om.sizemap.get(data["size"])
+            size_map = snap.sizemap.get(data["size"])
             if not size_map:
                 # Use default size
                 self.log.warn("Options Form Manager had no sizemap!")
@@ -200,85 +265,66 @@ class RubinWorkflowManager(Loggable):
             # using the Dask proxy dashboard from inside a Workflow anyway.
             synth_jsp = "/nb/user/{}".format(username)
             jsp = os.getenv("JUPYTERHUB_SERVER_PREFIX", synth_jsp)
-            lab_debug = data.get("debug")
-            if lab_debug:
-                lab_debug = True
-            else:
-                lab_debug = False
             wf_input["mem_limit"] = ml
             wf_input["mem_guar"] = mg
             wf_input["cpu_limit"] = str(cl)
             wf_input["cpu_guar"] = str(cg)
             wf_input["image"] = data["image"]
             wf_input["enable_multus"] = cfg.enable_multus
-            wf_input["debug"] = lab_debug
             wf_input["no_sudo"] = cfg.lab_no_sudo
+            # Start from the static environment and volume lists, and add
+            #  the per-user pieces.
             env = {}
             vols = []
             vmts = []
-            env.update(em_env)
-            vm.make_volumes_from_config()
-            vols.extend(vm.k8s_volumes)
-            vmts.extend(vm.k8s_vol_mts)
-            self.define_configmap(data)
-            vols.append(self.cmd_vol)
-            vmts.append(self.cmd_mt)
-            env["DASK_VOLUME_B64"] = vm.get_dask_volume_b64()
-            cname = data.get("name")
-            if not cname:
-                cname = "wf-{}-{}-{}".format(
-                    username,
-                    data["image"].split(":")[-1].replace("_", "-"),
-                    data["command"][0].split("/")[-1].replace("_", "-"),
-                )
-            wf_input["name"] = cname
+            env.update(snap.static_env)
+            vols.extend(snap.volumes)
+            vmts.extend(snap.mounts)
             env["MEM_LIMIT"] = ml
             env["MEM_GUARANTEE"] = mg
             env["CPU_LIMIT"] = str(cl)
             env["CPU_GUARANTEE"] = str(cg)
             env["JUPYTERHUB_USER"] = username
-            env["NONINTERACTIVE"] = "TRUE"
             env["EXTERNAL_UID"] = str(uid)
             env["EXTERNAL_GROUPS"] = gids
             env["JUPYTERHUB_SERVER_PREFIX"] = jsp
-            env["DEBUG"] = str_true(cfg.debug)
-            env["ACCESS_TOKEN"] = self.user.access_token
-            if cfg.lab_no_sudo:
-                env["NO_SUDO"] = "TRUE"
             e_l = self._d2l(env)
             wf_input["env"] = e_l
             wf_input["username"] = username
             wf_input["claims"] = claims
             wf_input["debug"] = cfg.debug
-            # Volumes and mounts aren't JSON-serializable...
-            wf_input["vols"] = "{}".format(vols)
-            wf_input["vmts"] = "{}".format(vmts)
-            self.log.debug(
-                "Input to Workflow Manipulator: {}".format(
-                    json.dumps(wf_input, indent=4, sort_keys=True)
+            if self.log.isEnabledFor(logging.DEBUG):
+                # Volumes and mounts aren't JSON-serializable...
+                wf_input["vols"] = "{}".format(vols)
+                wf_input["vmts"] = "{}".format(vmts)
+                self.log.debug(
+                    "Input to Workflow Manipulator: {}".format(
+                        json.dumps(wf_input, indent=4, sort_keys=True)
+                    )
                 )
-            )
-            # ...now put the real values back
+            # ...so put the real values in afterwards.
             wf_input["vols"] = vols
             wf_input["vmts"] = vmts
-            wf_input["command"] = data["command"]
-            manifest = self._create_manifest(wf_input)
-            self.workflow = manifest
-
-    def _create_manifest(self, parms):
-        with start_action(action_type="_create_manifest"):
-            if not parms:
-                raise ValueError("parms are required to create workflow.")
             sec_ctx = V1PodSecurityContext(
                 run_as_group=self.run_as_group, run_as_user=self.run_as_user,
             )
-            if parms["no_sudo"]:
-                claims = parms["claims"]
+            if wf_input["no_sudo"]:
                 uid = int(claims["uidNumber"])
                 sec_ctx.run_as_user = uid
                 sec_ctx.run_as_group = uid
                 supp_grps = get_supplemental_gids(claims)
                 sec_ctx.supplemental_groups = supp_grps
+            wf_input["sec_ctx"] = sec_ctx
+            wf_input["resources"] = V1ResourceRequirements(
+                limits={"memory": ml, "cpu": str(cl)},
+                requests={"memory": mg, "cpu": str(cg)},
+            )
+            return wf_input
+
+    def _create_manifest(self, parms):
+        with start_action(action_type="_create_manifest"):
+            if not parms:
+                raise ValueError("parms are required to create workflow.")
             container = V1Container(
                 command=["/opt/lsst/software/jupyterlab/provisionator.bash"],
                 args=[],
@@ -287,16 +333,7 @@ class RubinWorkflowManager(Loggable):
                 env=parms["env"],
                 image_pull_policy="Always",
                 volume_mounts=parms["vmts"],
-                resources=V1ResourceRequirements(
-                    limits={
-                        "memory": parms["mem_limit"],
-                        "cpu": parms["cpu_limit"],
-                    },
-                    requests={
-                        "memory": parms["mem_guar"],
-                        "cpu": parms["cpu_guar"],
-                    },
-                ),
+                resources=parms["resources"],
             )
             lbl = {"argocd.argoproj.io/instance": "nublado-users"}
             annotations = self._create_annotations(parms)
@@ -313,7 +350,7 @@ class RubinWorkflowManager(Loggable):
                 "spec": {
                     "entrypoint": "noninteractive",
                     "namespace": self.user.namespace,
-                    "securityContext": sec_ctx,
+                    "securityContext": parms["sec_ctx"],
                     "serviceAccountName": "{}-svcacct".format(
                         parms["username"]
                     ),
@@ -341,24 +378,13 @@ class RubinWorkflowManager(Loggable):
                 # This probably ought to be a config parameter
                 anno["k8s.v1.cni.cncf.io/networks"] = ks
 
-            cmdlist = parms["command"]
-            if not cmdlist:
-                return anno
-            annobase = "lsst.org/wf_cmd"
-            idx = 0
-            for cmd in cmdlist:
-                akey = annobase + "_{}".format(idx)
-                if len(cmd) < 64:
-                    anno[akey] = cmd
-                else:
-                    jdx = 0
-                    while cmd:
-                        chunk = cmd[:63]
-                        cmd = cmd[63:]
-                        skey = akey + "_{}".format(jdx)
-                        anno[skey] = chunk
-                        jdx = jdx + 1
-                idx = idx + 1
+            # The full command is in the configmap; record where, plus a
+            #  short readable summary.
+            anno[CMD_CONFIGMAP_ANNOTATION] = self.cfg_map.metadata.name
+            summary = " ".join(shlex.quote(x) for x in parms["command"])
+            if len(summary) > CMD_SUMMARY_MAX:
+                summary = summary[: CMD_SUMMARY_MAX - 3] + "..."
+            anno[CMD_SUMMARY_ANNOTATION] = summary
             return anno
 
     def _d2l(self, in_d):
@@ -368,38 +394,142 @@ class RubinWorkflowManager(Loggable):
                 ll.append({"name": k, "value": in_d[k]})
             return ll
 
-    def list_workflows(self):
+    def _use_cache(self, live):
+        return not live and self.wf_cache and self.wf_cache.synced
+
+    def _list_from_cache(
+        self, live, limit=None, continue_token=None, label_selector=None
+    ):
+        return self._use_cache(live) and not (
+            limit or continue_token or label_selector
+        )
+
+    def cached_list_version(self, live=False, **list_opts):
+        """Return the resourceVersion at which list_workflow_page(), given
+        the same arguments, would list the user's workflows from the
+        workflow cache, or None if it would not read the cache.
+        """
+        if not self._list_from_cache(
+            live,
+            list_opts.get("limit"),
+            list_opts.get("continue_token"),
+            list_opts.get("label_selector"),
+        ):
+            return None
+        return self.wf_cache.resource_version
+
+    def list_workflows(self, live=False):
+        wfs, _ = self.list_workflow_page(live=live)
+        return wfs
+
+    def list_workflow_page(
+        self,
+        live=False,
+        limit=None,
+        continue_token=None,
+        label_selector=None,
+        phases=None,
+        created_after=None,
+        created_before=None,
+    ):
+        """Return a tuple of (workflows, continue_token) for the user's
+        namespace; workflows is None if the namespace does not exist.
+
+        'limit' and 'continue_token' page through the list, and
+        'label_selector' and 'phases' are passed to Kubernetes as a label
+        selector (Argo labels each workflow with its phase).  Those all
+        need a live read.  Creation time cannot be selected on server-side,
+        so 'created_after' and 'created_before' (RFC 3339 strings) are
+        applied to each page as it arrives, which may leave it short.
+
+        Live reads skip model deserialization and return the JSON from
+        the API server as-is.  The resourceVersion the list was read at is
+        left in list_version.
+        """
         with start_action(action_type="list_workflows"):
             namespace = self.user.namespace
-            api = self.core_api
-            self.log.debug(
-                "Listing workflows in namespace '{}'".format(namespace)
-            )
-            nl = api.list_namespace(timeout_seconds=3)
-            for ns in nl.items:
-                nsname = ns.metadata.name
-                if nsname == namespace:
-                    self.log.debug("Namespace {} found.".format(namespace))
-                    found = True
-                    break
-            if not found:
+            token = None
+            self.list_version = None
+            if self._list_from_cache(
+                live, limit, continue_token, label_selector
+            ):
+                self.log.debug(
+                    "Listing cached workflows in namespace '{}'".format(
+                        namespace
+                    )
+                )
+                self.list_version, wfs = self.wf_cache.snapshot(namespace)
+                if phases:
+                    wfs = [
+                        x
+                        for x in wfs
+                        if (x.get("status") or {}).get("phase") in phases
+                    ]
+            elif not self.ns_cache.exists(namespace):
                 self.log.debug("No namespace {} found.".format(namespace))
-                wfs = None
+                return None, None
             else:
-                wf_api = self.wf_api
-                wfs = wf_api.list_namespaced_workflows(namespace=namespace)
-            return wfs
+                self.log.debug(
+                    "Listing workflows in namespace '{}'".format(namespace)
+                )
+                selectors = []
+                if label_selector:
+                    selectors.append(label_selector)
+                if phases:
+                    selectors.append(
+                        "{} in ({})".format(PHASE_LABEL, ",".join(phases))
+                    )
+                kw = {"_preload_content": False}
+                if selectors:
+                    kw["label_selector"] = ",".join(selectors)
+                if limit:
+                    kw["limit"] = limit
+                if continue_token:
+                    kw["_continue"] = continue_token
+                api = self.client_pool.get_custom_api()
+                resp = api.list_namespaced_custom_object(
+                    WF_GROUP, WF_VERSION, namespace, WF_PLURAL, **kw
+                )
+                body = json.loads(resp.data)
+                wfs = body.get("items") or []
+                body_md = body.get("metadata") or {}
+                token = body_md.get("continue")
+                self.list_version = body_md.get("resourceVersion")
+            if created_after or created_before:
+                wfs = [
+                    x
+                    for x in wfs
+                    if _created_between(x, created_after, created_before)
+                ]
+            return wfs, token or None
 
     def create_workflow(self):
+        try:
+            return self._create_workflow()
+        except ApiException as e:
+            if not self.provision_cache or not _maybe_unprovisioned(e):
+                raise
+            namespace = self.user.namespace
+            self.log.warning(
+                "Namespace {} not usable ({}); reprovisioning.".format(
+                    namespace, e.status
+                )
+            )
+            self.invalidate_provisioning()
+            self.provision()
+            return self._create_workflow()
+
+    def _create_workflow(self):
         with start_action(action_type="create_workflows"):
             workflow = self.workflow
             namespace = self.user.namespace
             self.create_configmap()
-            self.log.debug(
-                "Creating workflow in namespace {}: '{}'".format(
-                    namespace, workflow
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug(
+                    "Creating workflow in namespace {}: '{}'".format(
+                        namespace, workflow
+                    )
                 )
-            )
             wf_api = self.wf_api
             wf = wf_api.create_namespaced_workflow(namespace, workflow)
             return wf
@@ -408,6 +538,11 @@ class RubinWorkflowManager(Loggable):
         with start_action(action_type="create_configmap"):
             namespace = self.user.namespace
             cfgmap = self.cfg_map
+            cm_name = cfgmap.metadata.name
+            cm_cache = self.configmap_cache
+            if cm_cache and cm_cache.known(namespace, cm_name):
+                self.log.debug("Configmap {} known to exist.".format(cm_name))
+                return
             api = self.core_api
             try:
                 self.log.info(
@@ -420,23 +555,86 @@ class RubinWorkflowManager(Loggable):
                     self.log.exception(estr)
                     raise
                 else:
+                    # Made earlier, or by another server: stamp the reuse so
+                    #  no collector takes it before our workflow exists.
                     self.log.info("Configmap already exists.")
+                    if not self._touch_configmap(cm_name):
+                        # Collected since; it needs making again.
+                        api.create_namespaced_config_map(namespace, cfgmap)
+            if cm_cache:
+                cm_cache.mark(namespace, cm_name)
+
+    def _touch_configmap(self, cm_name):
+        """Stamp the time of use on an existing command configmap, so that
+        no server's collector deletes it before the workflow that is about
+        to mount it exists.  Return False if the configmap turns out to be
+        gone after all.
+        """
+        patch = {
+            "metadata": {
+                "annotations": {CM_USED_ANNOTATION: str(int(time.time()))}
+            }
+        }
+        try:
+            self.core_api.patch_namespaced_config_map(
+                cm_name, self.user.namespace, patch
+            )
+        except ApiException as e:
+            if e.status == 404:
+                return False
+            self.log.warning(
+                "Could not mark configmap {} used: {}".format(
+                    cm_name, e.reason
+                )
+            )
+        return True
 
     def submit_workflow(self, data):
         with start_action(action_type="submit_workflow"):
             self.define_workflow(data)  # sets self.workflow
-            user = self.user
+            self.provision()
+            wf = self.create_workflow()
+            return wf
+
+    def provision(self):
+        """Make sure the user's namespace, with its quota and supporting
+        objects, exists.
+        """
+        namespace = self.user.namespace
+        generation = self.config_snapshot.generation
+        p_cache = self.provision_cache
+        if p_cache and p_cache.fresh(namespace, generation):
             self.log.debug(
-                "submit_workflow user class: {}".format(
-                    user.__class__.__name__
-                )
+                "Namespace {} recently provisioned.".format(namespace)
             )
+            return
+        with PROVISION_LATENCY.time():
+            self._provision()
+        if p_cache:
+            p_cache.mark(namespace, generation)
+
+    def invalidate_provisioning(self):
+        """Forget everything cached about the user's namespace and what
+        is in it.
+        """
+        namespace = self.user.namespace
+        if self.provision_cache:
+            self.provision_cache.invalidate(namespace)
+        if self.configmap_cache:
+            self.configmap_cache.forget_namespace(namespace)
+        self.ns_cache.invalidate(namespace)
+
+    def _provision(self):
+        with start_action(action_type="provision"):
+            user = self.user
             self.log.debug(
-                "submit_workflow username: {}".format(user.escaped_name)
+                "provision user class: {}".format(user.__class__.__name__)
             )
+            self.log.debug("provision username: {}".format(user.escaped_name))
+            snap = self.config_snapshot
             rm = RubinMiddleManager(
                 parent=self,
-                config=RubinConfig(),
+                config=snap.config,
                 user=user,
                 authenticator=AM(parent=self),
             )
@@ -448,13 +646,56 @@ class RubinWorkflowManager(Loggable):
             nm.namespace = user.namespace
             qm = rm.quota_mgr
             om = rm.optionsform_mgr
-            om._make_sizemap()  # Guess it should be a public method.
+            om.sizemap = snap.sizemap
             qm.define_resource_quota_spec()
             # Not setting up workflows with a daskconfig.  Might need to
             #  in the future.
             nm.ensure_namespace(namespace=user.namespace)
-            wf = self.create_workflow()
-            return wf
+            self.ns_cache.mark_present(user.namespace)
+
+    def watch_workflow(self, wf, timeout=60):
+        """Generator yielding status change events (see workflow_delta())
+        for the workflow 'wf' (a JSON dict, from get_workflow()).
+
+        The first event describes the current state.  Later ones come from
+        a Kubernetes watch resumed at wf's resourceVersion and carry only
+        what changed.  The generator ends when the workflow reaches a
+        terminal phase, is deleted, or 'timeout' seconds pass.
+        """
+        md = wf["metadata"]
+        name = md["name"]
+        event, state = workflow_delta(wf)
+        yield event
+        if state["phase"] in TERMINAL_PHASES:
+            return
+        api = self.client_pool.get_custom_api()
+        w = Watch()
+        for wev in w.stream(
+            api.list_namespaced_custom_object,
+            WF_GROUP,
+            WF_VERSION,
+            md["namespace"],
+            WF_PLURAL,
+            field_selector="metadata.name={}".format(name),
+            resource_version=md["resourceVersion"],
+            timeout_seconds=timeout,
+        ):
+            etype = wev["type"]
+            obj = wev["raw_object"]
+            if etype == "ERROR":
+                self.log.warning(
+                    "Watch for '{}' failed: {}".format(name, obj)
+                )
+                break
+            if etype == "DELETED":
+                yield {"name": name, "phase": None, "deleted": True}
+                break
+            event, state = workflow_delta(obj, state)
+            if event:
+                yield event
+            if state["phase"] in TERMINAL_PHASES:
+                break
+        w.stop()
 
     def delete_workflow(self, wfid):
         with start_action(action_type="delete_workflow"):
@@ -463,33 +704,192 @@ class RubinWorkflowManager(Loggable):
             wf = api.delete_namespaced_workflow(namespace, wfid)
             return wf
 
-    def get_workflow(self, wfid):
+    def get_workflow(self, wfid, live=False):
         with start_action(action_type="get_workflow"):
-            namespace = self.user.namespace
-            api = self.wf_api
-            wf = api.get_namespaced_workflow(namespace, wfid)
+            wf = self.get_workflow_document(wfid, live=live)
+            if isinstance(wf, bytes):
+                return json.loads(wf)
             return wf
 
-    def get_logs(self, wf_id):
-        wf = self.get_workflow(wf_id)
-        api = self.core_api
+    def get_workflow_document(self, wfid, live=False):
+        """Return the workflow, or None if there is no such workflow, in
+        whichever form is cheapest to get: a JSON dict from the workflow
+        cache, or otherwise the raw JSON bytes from the API server.
+        """
+        if self._use_cache(live):
+            wf = self.wf_cache.get(self.user.namespace, wfid)
+            if wf:
+                return wf
+            # Fall through: it may simply be too new to have been seen
+            #  by the watch yet.
+            self.log.debug("Cache miss for workflow '{}'".format(wfid))
+        return self.get_workflow_raw(wfid)
+
+    def get_workflow_raw(self, wfid):
+        """Return the workflow exactly as the API server sent it, as JSON
+        bytes, or None if there is no such workflow.  This skips building
+        (and then serializing again) the Argo model objects, which is most
+        of the cost of reading a large workflow.
+        """
+        with start_action(action_type="get_workflow_raw"):
+            namespace = self.user.namespace
+            api = self.client_pool.get_custom_api()
+            try:
+                resp = api.get_namespaced_custom_object(
+                    WF_GROUP,
+                    WF_VERSION,
+                    namespace,
+                    WF_PLURAL,
+                    wfid,
+                    _preload_content=False,
+                )
+            except ApiException as e:
+                if e.status == 404:
+                    return None
+                raise
+            return resp.data
+
+    def get_workflow_command(self, wfid, live=False):
+        """Return the command the workflow runs, as a tuple of (list of
+        tokens, truncated), or None if there is no such workflow or its
+        command cannot be found.
+
+        The command is read from the configmap named in the workflow's
+        annotations.  Workflows submitted before that annotation existed
+        carry the command itself, split into 'lsst.org/wf_cmd_N[_M]'
+        annotations, and it is reassembled from those.  If the configmap
+        has been deleted, the command is recovered from the summary
+        annotation, and 'truncated' is True if the summary was cut short.
+        """
+        with start_action(action_type="get_workflow_command"):
+            wf = self.get_workflow(wfid, live=live)
+            if not wf:
+                return None
+            md = wf["metadata"]
+            anno = md.get("annotations") or {}
+            cm_name = anno.get(CMD_CONFIGMAP_ANNOTATION)
+            if not cm_name:
+                return _command_from_annotations(anno), False
+            api = self.core_api
+            try:
+                cm = api.read_namespaced_config_map(cm_name, md["namespace"])
+            except ApiException as e:
+                if e.status != 404:
+                    raise
+                self.log.warning("Configmap {} is gone.".format(cm_name))
+                return _command_from_summary(anno.get(CMD_SUMMARY_ANNOTATION))
+            cmd = json.loads(cm.data["command.json"]).get("command")
+            return cmd, False
+
+    def _log_kwargs(
+        self, tail_lines=None, since_seconds=None, limit_bytes=None
+    ):
+        kw = {"container": "main"}
+        if tail_lines is not None:
+            kw["tail_lines"] = tail_lines
+        if since_seconds is not None:
+            kw["since_seconds"] = since_seconds
+        if limit_bytes is not None:
+            kw["limit_bytes"] = limit_bytes
+        return kw
+
+    def get_log_nodes(self, wf_id, live=False):
+        """Return the names of the workflow's pods, ordered by start time,
+        or None if there is no such workflow.  DAG, Steps and other
+        non-Pod nodes have no logs, so they are skipped.
+        """
+        wf = self.get_workflow(wf_id, live=live)
         if not wf:
             self.log.debug("No workflow '{}' found".format(wf_id))
             return None
+        nd = wf.get("status", {}).get("nodes") or {}
+        pods = [
+            (node.get("startedAt") or "", node_id)
+            for node_id, node in nd.items()
+            if node.get("type") == "Pod"
+        ]
+        pods.sort()
+        return [x[1] for x in pods]
+
+    def _read_pod_log(self, pod_id, kw):
         namespace = self.user.namespace
-        nd = wf.status.nodes
-        loglist = []
-        for pod_id in nd:
+        self.log.debug(
+            "Getting logs for '{}' in namespace '{}'".format(
+                pod_id, namespace
+            )
+        )
+        try:
+            logs = self.core_api.read_namespaced_pod_log(
+                pod_id, namespace, _request_timeout=self.log_timeout, **kw
+            )
+        except Exception as exc:
+            self.log.warning(
+                "Could not read logs for '{}': {}".format(pod_id, exc)
+            )
+            return {"name": pod_id, "logs": None, "error": str(exc)}
+        return {"name": pod_id, "logs": logs}
+
+    def get_logs(self, wf_id, live=False, **log_opts):
+        """Return a list of {"name": pod, "logs": text} for the workflow,
+        ordered by pod start time.  'log_opts' may contain tail_lines,
+        since_seconds and limit_bytes, which are applied to each pod.
+
+        Pod logs are fetched concurrently, up to 'log_workers' at a time,
+        each with a 'log_timeout' second timeout.  A pod whose log could
+        not be read has "logs" set to None and an "error" entry.
+        """
+        pods = self.get_log_nodes(wf_id, live=live)
+        if pods is None:
+            return None
+        kw = self._log_kwargs(**log_opts)
+        if len(pods) < 2:
+            return [self._read_pod_log(x, kw) for x in pods]
+        workers = min(len(pods), self.log_workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # map() returns results in input order.
+            return list(
+                executor.map(lambda x: self._read_pod_log(x, kw), pods)
+            )
+
+    def stream_logs(self, pods, follow=False, **log_opts):
+        """Generator yielding {"name": pod, "line": text} for each log
+        line of each pod in 'pods' (from get_log_nodes()), as it is read
+        from the API server, without buffering whole logs.  With 'follow',
+        each pod's log is followed until its container exits before moving
+        on to the next pod.  If a pod's log cannot be read, a single
+        {"name": pod, "error": text} record is yielded in its place.
+        """
+        api = self.core_api
+        namespace = self.user.namespace
+        kw = self._log_kwargs(**log_opts)
+        for pod_id in pods:
             self.log.debug(
-                "Getting logs for '{}' in namespace '{}'".format(
+                "Streaming logs for '{}' in namespace '{}'".format(
                     pod_id, namespace
                 )
             )
-            logs = api.read_namespaced_pod_log(
-                pod_id, namespace, container="main"
-            )
-            loglist.append({"name": pod_id, "logs": logs})
-        return loglist
+            try:
+                resp = api.read_namespaced_pod_log(
+                    pod_id,
+                    namespace,
+                    follow=follow,
+                    _preload_content=False,
+                    **kw
+                )
+            except Exception as exc:
+                self.log.warning(
+                    "Could not read logs for '{}': {}".format(pod_id, exc)
+                )
+                yield {"name": pod_id, "error": str(exc)}
+                continue
+            try:
+                for line in resp:
+                    yield {
+                        "name": pod_id,
+                        "line": line.decode("utf-8", "replace").rstrip("\n"),
+                    }
+            finally:
+                resp.release_conn()
 
     def dump(self):
         """Return contents dict for aggregation and pretty-printing.
@@ -504,3 +904,54 @@ class RubinWorkflowManager(Loggable):
 
     def toJSON(self):
         return json.dumps(self.dump())
+
+
+def _command_from_annotations(anno):
+    annobase = "lsst.org/wf_cmd_"
+    parts = {}
+    for key, val in anno.items():
+        if not key.startswith(annobase):
+            continue
+        idx = key[len(annobase):].split("_")
+        if not all(x.isdigit() for x in idx):
+            continue
+        jdx = int(idx[1]) if len(idx) > 1 else 0
+        parts.setdefault(int(idx[0]), []).append((jdx, val))
+    return ["".join(x[1] for x in sorted(parts[k])) for k in sorted(parts)]
+
+
+def _maybe_unprovisioned(exc):
+    """Return True if an API error suggests that the user's namespace, or
+    our access to it, has gone away since it was provisioned.  Quota
+    exhaustion is also a 403, but reprovisioning will not help that.
+    """
+    if exc.status == 404:
+        return True
+    if exc.status != 403:
+        return False
+    body = exc.body or ""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    return "exceeded quota" not in "{} {}".format(exc.reason, body)
+
+
+def _command_from_summary(summary):
+    if summary is None:
+        return None
+    truncated = len(summary) >= CMD_SUMMARY_MAX and summary.endswith("...")
+    try:
+        return shlex.split(summary), truncated
+    except ValueError:
+        # Cut off inside a quoted token.
+        return summary.split(), True
+
+
+def _created_between(wf, after, before):
+    # Kubernetes timestamps are all UTC in the same RFC 3339 format, so
+    #  they compare correctly as strings.
+    created = wf["metadata"].get("creationTimestamp") or ""
+    if after and created < after:
+        return False
+    if before and created >= before:
+        return False
+    return True
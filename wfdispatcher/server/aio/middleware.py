@@ -0,0 +1,22 @@
+class AsyncMiddleware(object):
+    """Adapt one of our synchronous middleware components for Falcon's
+    ASGI app, which requires coroutine hooks.  If 'run_sync' is given,
+    process_request() is run through it (i.e. off the event loop), which
+    we want for anything that may do network I/O, such as token
+    verification.
+    """
+
+    def __init__(self, middleware, run_sync=None):
+        self.middleware = middleware
+        self.run_sync = run_sync
+
+    async def process_request(self, req, resp):
+        if self.run_sync:
+            await self.run_sync(self.middleware.process_request, req, resp)
+        else:
+            self.middleware.process_request(req, resp)
+
+    async def process_response(self, req, resp, resource, req_succeeded):
+        hook = getattr(self.middleware, "process_response", None)
+        if hook:
+            hook(req, resp, resource, req_succeeded)
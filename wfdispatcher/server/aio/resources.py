@@ -0,0 +1,149 @@
+"""ASGI variants of the route resources.  Each one reuses the synchronous
+resource's logic, but runs it on the server's I/O thread pool so that
+Kubernetes and Argo calls do not block the event loop.
+"""
+import falcon
+from ...objects.actionlog import start_action
+from ...helpers.set_media import set_media
+from ..command import Command
+from ..details import Details
+from ..list import List, CONTINUE_HEADER
+from ..logs import Logs, NDJSON, ndjson_lines
+from ..metrics import Metrics
+from ..new import New
+from ..newbatch import NewBatch
+from ..pods import Pods
+from ..singleworkflow import SingleWorkflow
+from ..submission import Submission
+from ..version import Version
+from ..watch import Watch
+
+
+class AsyncVersion(Version):
+    async def on_get(self, req, resp):
+        super().on_get(req, resp)
+
+
+class AsyncList(List):
+    async def on_get(self, req, resp):
+        with start_action(action_type="async_list/on_get"):
+            wfs, token = await self.parent.run_sync(
+                self.get_page, req, resp
+            )
+            if token:
+                resp.set_header(CONTINUE_HEADER, token)
+            set_media(resp, wfs)
+
+
+class AsyncSingleWorkflow(SingleWorkflow):
+    async def on_get(self, req, resp, wf_id):
+        with start_action(action_type="async_single/on_get"):
+            if not self.want_full_view(req):
+                summary = await self.parent.run_sync(
+                    self.get_wf_summary, req, resp, wf_id
+                )
+                set_media(resp, summary)
+                return
+            data = await self.parent.run_sync(
+                self.get_wf_data, req, resp, wf_id
+            )
+            self.set_wf_data(resp, data)
+
+    async def on_delete(self, req, resp, wf_id):
+        with start_action(action_type="async_single/on_delete"):
+            resp.media = await self.parent.run_sync(
+                self.delete_wf, req, wf_id
+            )
+
+
+class AsyncPods(Pods):
+    async def on_get(self, req, resp, wf_id):
+        with start_action(action_type="async_pods/on_get"):
+            pods = await self.parent.run_sync(
+                self.get_pods, req, resp, wf_id
+            )
+            set_media(resp, pods)
+
+
+class AsyncCommand(Command):
+    async def on_get(self, req, resp, wf_id):
+        with start_action(action_type="async_command/on_get"):
+            resp.media = await self.parent.run_sync(
+                self.get_command, req, wf_id
+            )
+
+
+class AsyncDetails(Details):
+    async def on_get(self, req, resp, wf_id, pod_id):
+        with start_action(action_type="async_details/on_get"):
+            details = await self.parent.run_sync(
+                self.get_details, req, resp, wf_id, pod_id
+            )
+            set_media(resp, details)
+
+
+class AsyncLogs(Logs):
+    async def on_get(self, req, resp, wf_id):
+        with start_action(action_type="async_logs/on_get"):
+            opts = self.get_log_opts(req)
+            if not opts["stream"]:
+                resp.media = await self.parent.run_sync(
+                    self.get_logs, req, wf_id, opts
+                )
+                return
+            records = await self.parent.run_sync(
+                self.stream_logs, req, wf_id, opts
+            )
+            resp.content_type = NDJSON
+            resp.stream = self.parent.iterate_sync(ndjson_lines(records))
+
+
+class AsyncMetrics(Metrics):
+    async def on_get(self, req, resp):
+        super().on_get(req, resp)
+
+
+class AsyncNew(New):
+    async def on_post(self, req, resp):
+        with start_action(action_type="async_new/on_post"):
+            data = await req.get_media()
+            if self.parent.submission_queue:
+                self.accept(resp, self.enqueue(req, data))
+                return
+            resp.media = await self.parent.run_sync(self.create, req, data)
+
+
+class AsyncNewBatch(NewBatch):
+    async def on_post(self, req, resp):
+        with start_action(action_type="async_newbatch/on_post"):
+            data = await req.get_media()
+            if self.parent.submission_queue:
+                resp.status = falcon.HTTP_202
+                resp.media = await self.parent.run_sync(
+                    self.enqueue_batch, req, data
+                )
+                return
+            resp.media = await self.parent.run_sync(
+                self.create_batch, req, data
+            )
+
+
+class AsyncSubmission(Submission):
+    async def on_get(self, req, resp, sub_id):
+        resp.media = self.get_submission(req, sub_id)
+
+
+class AsyncWatch(Watch):
+    async def on_get(self, req, resp, wf_id):
+        with start_action(action_type="async_watch/on_get"):
+            wait, timeout = self.get_watch_opts(req)
+            if wait:
+                resp.media = await self.parent.run_sync(
+                    self.wait_for, req, wf_id, wait, timeout
+                )
+                return
+            events = await self.parent.run_sync(
+                self.watch, req, wf_id, timeout
+            )
+            resp.content_type = NDJSON
+            resp.stream = self.parent.iterate_sync(ndjson_lines(events))
@@ -0,0 +1,148 @@
+"""ASGI variant of the workflow dispatch server.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import falcon.asgi
+from ..server import Server
+from .middleware import AsyncMiddleware
+from .resources import (
+    AsyncCommand,
+    AsyncDetails,
+    AsyncList,
+    AsyncLogs,
+    AsyncMetrics,
+    AsyncNew,
+    AsyncNewBatch,
+    AsyncPods,
+    AsyncSingleWorkflow,
+    AsyncSubmission,
+    AsyncVersion,
+    AsyncWatch,
+)
+
+OPTIONS_ENV_VAR = "WFDISPATCHER_SERVER_OPTIONS"
+
+
+class AsyncServer(Server):
+    """Serve the same routes as Server, but as a Falcon ASGI app.
+
+    The Kubernetes and Argo clients are synchronous, so every call that
+    may touch the network is run on a dedicated pool of 'io_threads'
+    threads; the event loop itself only parses requests and writes
+    responses.  Log and watch streams, which may block for minutes at a
+    time, are read on a separate pool of 'stream_threads' threads, so
+    that however many of them are open, authentication and quick
+    requests are not starved.
+    """
+
+    def __init__(self, *args, **kwargs):
+        io_threads = kwargs.pop("io_threads", 32)
+        stream_threads = kwargs.pop("stream_threads", 64)
+        self.executor = ThreadPoolExecutor(
+            max_workers=io_threads, thread_name_prefix="wf-io"
+        )
+        self.stream_executor = ThreadPoolExecutor(
+            max_workers=stream_threads, thread_name_prefix="wf-stream"
+        )
+        # One API connection per I/O or stream thread.
+        kwargs.setdefault("api_pool_size", io_threads + stream_threads)
+        super().__init__(*args, **kwargs)
+
+    def create_app(self):
+        mw = []
+        for component in self.create_middleware():
+            # Authentication may have to ask Gafaelfawr, so it runs off the
+            #  event loop.
+            run_sync = None
+            if component is self.authenticator:
+                run_sync = self.run_sync
+            mw.append(AsyncMiddleware(component, run_sync=run_sync))
+        return falcon.asgi.App(middleware=mw)
+
+    def create_resources(self):
+        return {
+            "version": AsyncVersion(),
+            "list": AsyncList(parent=self),
+            "single": AsyncSingleWorkflow(parent=self),
+            "pods": AsyncPods(parent=self),
+            "logs": AsyncLogs(parent=self),
+            "new": AsyncNew(parent=self),
+            "newbatch": AsyncNewBatch(parent=self),
+            "details": AsyncDetails(parent=self),
+            "watch": AsyncWatch(parent=self),
+            "command": AsyncCommand(parent=self),
+            "metrics": AsyncMetrics(),
+            "submission": AsyncSubmission(parent=self),
+        }
+
+    async def run_sync(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the I/O thread pool, carrying the
+        current context (and thus the eliot action) along with it.
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        return await loop.run_in_executor(self.executor, call)
+
+    def iterate_sync(self, gen):
+        """Return an async iterator over a blocking generator, fetching
+        each item on the stream thread pool.
+        """
+        return SyncIterator(gen, self.stream_executor)
+
+
+class SyncIterator(object):
+    """Async iterator over the blocking generator 'gen', fetching each
+    item on 'executor' in the current context.
+
+    Falcon awaits close() when the response is finished, including when
+    the client has gone away mid-stream; it closes the generator, which
+    releases the upstream watch or log connection.  If an item is still
+    being fetched, the generator is closed once that fetch returns.
+    """
+
+    def __init__(self, gen, executor):
+        self.gen = gen
+        self.executor = executor
+        self._done = object()
+        self._pending = None
+        self._closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._closed:
+            raise StopAsyncIteration
+        ctx = contextvars.copy_context()
+        self._pending = self.executor.submit(
+            ctx.run, next, self.gen, self._done
+        )
+        item = await asyncio.wrap_future(self._pending)
+        if item is self._done:
+            raise StopAsyncIteration
+        return item
+
+    async def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        pending = self._pending
+        if pending is not None and not pending.done():
+            pending.add_done_callback(lambda _: self.gen.close())
+        else:
+            self.executor.submit(self.gen.close)
+
+
+def make_asgi_app():
+    """App factory for ASGI servers that start their own workers (e.g.
+    'uvicorn --factory').  Server options are read as JSON from the
+    WFDISPATCHER_SERVER_OPTIONS environment variable.
+    """
+    options = json.loads(os.getenv(OPTIONS_ENV_VAR) or "{}")
+    return AsyncServer(**options).app
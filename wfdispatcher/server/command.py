@@ -0,0 +1,26 @@
+from ..objects.actionlog import log_call
+from falcon import HTTPNotFound
+from rubin_jupyter_utils.hub import LoggableChild
+from ..helpers.want_live_read import want_live_read
+
+
+class Command(LoggableChild):
+    @log_call
+    def on_get(self, req, resp, wf_id):
+        """Return the full command the workflow runs, as
+        {"name": <workflow>, "command": [<tokens>], "truncated": <bool>}.
+        The workflow itself only carries a summary of the command, which
+        may have been cut short; if the full command has since been
+        deleted, the summary is returned instead, and "truncated" says
+        whether it was cut short.
+        """
+        resp.media = self.get_command(req, wf_id)
+
+    def get_command(self, req, wf_id):
+        self.log.debug("Getting command for workflow '{}'".format(wf_id))
+        rm = self.parent.make_workflow_manager(req)
+        found = rm.get_workflow_command(wf_id, live=want_live_read(req))
+        if found is None:
+            raise HTTPNotFound()
+        cmd, truncated = found
+        return {"name": wf_id, "command": cmd, "truncated": truncated}
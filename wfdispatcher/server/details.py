@@ -1,26 +1,33 @@
 from rubin_jupyter_utils.hub import LoggableChild
-from eliot import log_call
+from ..objects.actionlog import log_call
 from falcon import HTTPNotFound
-from ..helpers.sanitize import sanitize
-from ..objects.workflowmanager import RubinWorkflowManager
+from ..helpers.not_modified import not_modified
+from ..helpers.resource_version import resource_version
+from ..helpers.set_media import set_media
+from ..helpers.want_live_read import want_live_read
 
 
 class Details(LoggableChild):
     @log_call
     def on_get(self, req, resp, wf_id, pod_id):
+        set_media(resp, self.get_details(req, resp, wf_id, pod_id))
+
+    def get_details(self, req, resp, wf_id, pod_id):
         self.log.debug(
             "Getting details for pod '{}' in workflow '{}'".format(
                 pod_id, wf_id
             )
         )
-        rm = RubinWorkflowManager(req=req)
-        wf = rm.get_workflow(wf_id)
+        rm = self.parent.make_workflow_manager(req)
+        wf = rm.get_workflow(wf_id, live=want_live_read(req))
         if not wf:
             raise HTTPNotFound()
-        nd = wf.status.nodes
+        nd = wf.get("status", {}).get("nodes")
         if not nd:
             raise HTTPNotFound()
         pod = nd.get(pod_id)
         if not pod:
             raise HTTPNotFound()
-        resp.media = sanitize(pod)
+        if not_modified(req, resp, resource_version(wf)):
+            return None
+        return pod
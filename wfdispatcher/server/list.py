@@ -1,21 +1,87 @@
-from eliot import log_call
+import falcon
+from ..objects.actionlog import log_call
+from kubernetes.client.rest import ApiException
 from rubin_jupyter_utils.hub import LoggableChild
-from ..objects.workflowmanager import RubinWorkflowManager
+from ..helpers.get_param_as_csv import get_param_as_csv
+from ..helpers.not_modified import not_modified
+from ..helpers.project_workflow import project_workflow, WORKFLOW_FIELDS
+from ..helpers.set_media import set_media
+from ..helpers.want_live_read import want_live_read
+
+CONTINUE_HEADER = "X-Continue-Token"
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 
 
 class List(LoggableChild):
     @log_call
     def on_get(self, req, resp):
-        rm = RubinWorkflowManager(req=req)
-        wfs = rm.list_workflows()
-        if not wfs:
-            resp.media = []
-            return
-        resp.media = extract_wf_names(wfs.items)
+        """List the user's workflows.
+
+        Query parameters:
+          limit: <int, page size; if more remain, the continue token for
+                  the next page is returned in the X-Continue-Token header>
+          continue: <str, continue token from the previous page>
+          phase: <str, comma-separated workflow phases to include>
+          labels: <str, Kubernetes label selector>
+          created_after, created_before: <str, UTC time as
+                  'YYYY-MM-DDTHH:MM:SSZ'>
+          fields: <str, comma-separated fields of each workflow to return,
+                   from 'name' (the default), 'namespace', 'createdAt',
+                   'labels', 'phase', 'startedAt', 'finishedAt', 'message'>
 
+        The response's ETag follows the list's resourceVersion; a request
+        whose If-None-Match names it gets a 304 Not Modified, without the
+        list being read at all if it would come from the workflow cache.
+        """
+        wfs, token = self.get_page(req, resp)
+        if token:
+            resp.set_header(CONTINUE_HEADER, token)
+        set_media(resp, wfs)
 
-def extract_wf_names(wfl):
-    rl = []
-    for wf in wfl:
-        rl.append({"name": wf.metadata.name})
-    return rl
+    def get_list_opts(self, req):
+        fields = get_param_as_csv(req, "fields", default=["name"])
+        bad = [x for x in fields if x not in WORKFLOW_FIELDS]
+        if bad:
+            raise falcon.HTTPBadRequest(
+                description="Unknown fields '{}'; must be from '{}'!".format(
+                    bad, list(WORKFLOW_FIELDS.keys())
+                )
+            )
+        opts = {
+            "live": want_live_read(req),
+            "limit": req.get_param_as_int(
+                "limit", min_value=1, max_value=5000
+            ),
+            "continue_token": req.get_param("continue"),
+            "label_selector": req.get_param("labels"),
+            "phases": get_param_as_csv(req, "phase"),
+        }
+        for fld in ["created_after", "created_before"]:
+            dt = req.get_param_as_datetime(fld, format_string=TIME_FORMAT)
+            opts[fld] = dt.strftime(TIME_FORMAT) if dt else None
+        return fields, opts
+
+    def get_page(self, req, resp):
+        """Return a tuple of (projected workflows, continue token).  If
+        the client's copy is current, the response is made a 304 and the
+        workflows are None.
+        """
+        fields, opts = self.get_list_opts(req)
+        rm = self.parent.make_workflow_manager(req)
+        if not_modified(req, resp, rm.cached_list_version(**opts)):
+            return None, None
+        try:
+            wfs, token = rm.list_workflow_page(**opts)
+        except ApiException as exc:
+            if exc.status == 410:
+                raise falcon.HTTPGone(
+                    description="Continue token expired; list again."
+                )
+            if exc.status == 400:
+                raise falcon.HTTPBadRequest(description=exc.reason)
+            raise
+        if not_modified(req, resp, rm.list_version):
+            return None, token
+        if not wfs:
+            return [], None
+        return [project_workflow(x, fields) for x in wfs], token
@@ -1,11 +1,68 @@
-from eliot import log_call
+import json
+from ..objects.actionlog import log_call
+from falcon import HTTPNotFound
 from rubin_jupyter_utils.hub import LoggableChild
-from ..objects.workflowmanager import RubinWorkflowManager
+from ..helpers.want_live_read import want_live_read
+
+NDJSON = "application/x-ndjson"
 
 
 class Logs(LoggableChild):
     @log_call
     def on_get(self, req, resp, wf_id):
+        """Return workflow logs.
+
+        Query parameters 'tail_lines', 'since_seconds' and 'limit_bytes'
+        are applied to each pod's log.  With 'stream=true' (implied by
+        'follow=true'), the response is newline-delimited JSON, one
+        {"name": <pod>, "line": <text>} object per log line, sent as it
+        is read; otherwise it is a single JSON list of
+        {"name": <pod>, "logs": <text>}.
+        """
+        opts = self.get_log_opts(req)
+        if not opts["stream"]:
+            resp.media = self.get_logs(req, wf_id, opts)
+            return
+        resp.content_type = NDJSON
+        resp.stream = ndjson_lines(self.stream_logs(req, wf_id, opts))
+
+    def get_log_opts(self, req):
+        follow = req.get_param_as_bool("follow", default=False)
+        return {
+            "live": want_live_read(req),
+            "follow": follow,
+            "stream": req.get_param_as_bool("stream", default=False)
+            or follow,
+            "log_opts": {
+                "tail_lines": req.get_param_as_int("tail_lines", min_value=0),
+                "since_seconds": req.get_param_as_int(
+                    "since_seconds", min_value=1
+                ),
+                "limit_bytes": req.get_param_as_int(
+                    "limit_bytes", min_value=1
+                ),
+            },
+        }
+
+    def get_logs(self, req, wf_id, opts):
         self.log.debug("Fetching logs for workflow '{}'".format(wf_id))
-        rm = RubinWorkflowManager(req=req)
-        resp.media = rm.get_logs(wf_id)
+        rm = self.parent.make_workflow_manager(req)
+        return rm.get_logs(wf_id, live=opts["live"], **opts["log_opts"])
+
+    def stream_logs(self, req, wf_id, opts):
+        """Resolve the workflow's pods (raising HTTPNotFound before we
+        start streaming) and return a generator over their log lines.
+        """
+        self.log.debug("Streaming logs for workflow '{}'".format(wf_id))
+        rm = self.parent.make_workflow_manager(req)
+        pods = rm.get_log_nodes(wf_id, live=opts["live"])
+        if pods is None:
+            raise HTTPNotFound()
+        return rm.stream_logs(
+            pods, follow=opts["follow"], **opts["log_opts"]
+        )
+
+
+def ndjson_lines(records):
+    for rec in records:
+        yield (json.dumps(rec) + "\n").encode("utf-8")
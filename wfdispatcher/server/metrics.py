@@ -0,0 +1,48 @@
+import functools
+import time
+import falcon
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from ..objects.metrics import IN_FLIGHT, REQUESTS, REQUEST_LATENCY
+from .releasingstream import release_after_response
+
+METRICS_PATH = "/metrics"
+
+
+class MetricsMiddleware(object):
+    """Count and time every request, by the route template it matched.
+    This should be the first middleware, so that the time spent in the
+    others (such as authentication) is included.  A request with a
+    streamed body (logs, watch) stays in flight, and is timed, until the
+    stream has been sent or abandoned.
+    """
+
+    def process_request(self, req, resp):
+        req.context.metrics_start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+    def process_response(self, req, resp, resource, req_succeeded):
+        start = req.context.get("metrics_start")
+        if start is None:
+            return
+        req.context.metrics_start = None
+        route = req.uri_template or "unmatched"
+        status = str(resp.status)[:3]
+        REQUESTS.labels(route, req.method, status).inc()
+        release_after_response(
+            resp, functools.partial(_finish, route, req.method, start)
+        )
+
+
+def _finish(route, method, start):
+    IN_FLIGHT.dec()
+    REQUEST_LATENCY.labels(route, method).observe(time.perf_counter() - start)
+
+
+class Metrics(object):
+    def on_get(self, req, resp):
+        """Return metrics in the Prometheus text format.  This route
+        needs no authentication.
+        """
+        resp.content_type = CONTENT_TYPE_LATEST
+        resp.data = generate_latest(REGISTRY)
+        resp.status = falcon.HTTP_200
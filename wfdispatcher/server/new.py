@@ -1,9 +1,10 @@
+import functools
 import json
+import logging
 import falcon
-from eliot import log_call, start_action
-from rubin_jupyter_utils.hub import LoggableChild, RubinMiddleManager
-from rubin_jupyter_utils.config import RubinConfig
-from ..objects.workflowmanager import RubinWorkflowManager
+from ..objects.actionlog import log_call, start_action
+from rubin_jupyter_utils.hub import LoggableChild
+from ..objects.submissionqueue import QueueFull
 
 
 class New(LoggableChild):
@@ -36,22 +37,55 @@ class New(LoggableChild):
 
         The last four will be used to create the container itself.  The
         booleans default to False if omitted.
+
+        If the server has a submission queue, the workflow is queued
+        rather than created, and the response is 202 Accepted with
+        {"submission": <ticket ID>, "state": "queued"}; the result can be
+        found at /submission/<ticket ID>.
+        """
+        if self.parent.submission_queue:
+            self.accept(resp, self.enqueue(req, req.media))
+            return
+        resp.media = self.create(req, req.media)
+
+    def accept(self, resp, ticket):
+        resp.status = falcon.HTTP_202
+        resp.location = "/submission/{}".format(ticket["submission"])
+        resp.media = ticket
+
+    def create(self, req, data):
+        """Validate the POST body, submit the workflow, and return the
+        response document.
         """
-        data = req.media
-        self.log.debug(
-            "Received POST body: {}".format(
-                json.dumps(data, sort_keys=True, indent=4)
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(
+                "Received POST body: {}".format(
+                    json.dumps(data, sort_keys=True, indent=4)
+                )
             )
-        )
         self._validate_input(data)
         # If we got here, it's syntactically valid
         wf = self.make_workflow(req, data)
-        if wf:
-            resp.media = {"name": wf.metadata.name}
-        else:
+        if not wf:
             raise falcon.HTTPInternalServerError(
                 description="No workflow created"
             )
+        return {"name": wf.metadata.name}
+
+    def enqueue(self, req, data):
+        """Validate the POST body and queue the workflow for submission.
+        """
+        self._validate_input(data)
+        wm = self.parent.make_workflow_manager(req)
+        try:
+            ticket = self.parent.submission_queue.submit(
+                wm.user.name, functools.partial(wm.submit_workflow, data)
+            )
+        except QueueFull as exc:
+            raise falcon.HTTPServiceUnavailable(
+                description=str(exc), retry_after=5
+            )
+        return {"submission": ticket["id"], "state": ticket["state"]}
 
     @log_call
     def _validate_input(self, data):
@@ -68,7 +102,7 @@ class New(LoggableChild):
                 )
             )
         if typ == "nb":
-            raise ue("Type 'nb' not supported yet.")
+            raise ue(description="Type 'nb' not supported yet.")
             kernel = type.get("kernel")
             if type(kernel) is not str:
                 raise ue(description="'kernel' must be a string!")
@@ -92,10 +126,9 @@ class New(LoggableChild):
         if type(image) is not str:
             raise ue(description="'image' must be a string!")
         if not image:
-            raise ue("No image specified for container!")
+            raise ue(description="No image specified for container!")
         sz = data.get("size")
-        rm = RubinMiddleManager(parent=self, config=RubinConfig())
-        szl = rm.config.form_sizelist
+        szl = self.parent.config_snapshot.sizelist
         if type(sz) is not str or sz not in szl:
             raise ue(
                 description="'size' must be a string from '{}'!".format(szl)
@@ -103,6 +136,6 @@ class New(LoggableChild):
 
     def make_workflow(self, req, data):
         with start_action(action_type="make_workflow"):
-            wm = RubinWorkflowManager(req=req)
+            wm = self.parent.make_workflow_manager(req)
             wf = wm.submit_workflow(data)
             return wf
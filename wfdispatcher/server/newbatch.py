@@ -0,0 +1,174 @@
+import functools
+import itertools
+import json
+import string
+from concurrent.futures import ThreadPoolExecutor
+import falcon
+from ..objects.actionlog import log_call, start_action
+from ..objects.submissionqueue import QueueFull
+from ..helpers.describe_error import describe_error
+from .new import New
+
+MAX_BATCH = 1000
+MAX_PARALLEL = 16
+
+
+class NewBatch(New):
+    @log_call
+    def on_post(self, req, resp):
+        """Handle the request to create many Workflows at once.
+
+        The body is either a list of workflow bodies (each as for '/new'):
+        {
+          items: [ <body>, ... ],
+          max_parallel: <int, how many workflows to create at once;
+                         default 8, at most 16>
+        }
+        or a template body plus a parameter matrix:
+        {
+          template: <body>,
+          parameters: { <KEY>: [ <value>, ... ], ... },
+          max_parallel: <int>
+        }
+        In the latter case one workflow is created for each combination of
+        parameter values, substituting '${KEY}' in the template's command
+        tokens and name.
+
+        Every item is validated before anything is created.  The response
+        is a list, in item order, of {"name": <workflow name>} or
+        {"error": <text>, "status": <Kubernetes API status, if any>} for
+        items that could not be created.
+
+        If the server has a submission queue, every item is queued (or,
+        if there is not room for them all, none is, and the response is
+        503) and the response is 202 Accepted with a list, in item order,
+        of {"submission": <ticket ID>, "state": "queued"}.
+        """
+        if self.parent.submission_queue:
+            resp.status = falcon.HTTP_202
+            resp.media = self.enqueue_batch(req, req.media)
+            return
+        resp.media = self.create_batch(req, req.media)
+
+    def validate_batch(self, data):
+        """Validate the POST body and return the list of workflow bodies.
+        """
+        items = self._expand_items(data)
+        for idx, item in enumerate(items):
+            try:
+                self._validate_input(item)
+            except falcon.HTTPError as exc:
+                raise falcon.HTTPUnprocessableEntity(
+                    description="Item {}: {}".format(idx, exc.description)
+                )
+        return items
+
+    def enqueue_batch(self, req, data):
+        items = self.validate_batch(data)
+        # Each job needs its own manager, which holds the workflow it
+        #  defines.
+        wms = [self.parent.make_workflow_manager(req) for _ in items]
+        jobs = [
+            functools.partial(wm.submit_workflow, item)
+            for wm, item in zip(wms, items)
+        ]
+        try:
+            tickets = self.parent.submission_queue.submit_many(
+                wms[0].user.name, jobs
+            )
+        except QueueFull as exc:
+            raise falcon.HTTPServiceUnavailable(
+                description=str(exc), retry_after=5
+            )
+        return [{"submission": x["id"], "state": x["state"]} for x in tickets]
+
+    def create_batch(self, req, data):
+        items = self.validate_batch(data)
+        max_parallel = data.get("max_parallel", 8)
+        if type(max_parallel) is not int or max_parallel < 1:
+            raise falcon.HTTPUnprocessableEntity(
+                description="'max_parallel' must be a positive integer!"
+            )
+        max_parallel = min(max_parallel, MAX_PARALLEL, len(items))
+        with start_action(action_type="make_workflow_batch", count=len(items)):
+            # Namespace, quota and configuration only need doing once.
+            self.parent.make_workflow_manager(req).provision()
+            with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+                return list(
+                    pool.map(lambda d: self._submit_one(req, d), items)
+                )
+
+    def _submit_one(self, req, data):
+        try:
+            wm = self.parent.make_workflow_manager(req)
+            wm.define_workflow(data)
+            wf = wm.create_workflow()
+        except Exception as exc:
+            self.log.error("Batch item failed: {}".format(exc))
+            return describe_error(exc)
+        if not wf:
+            return {"error": "No workflow created"}
+        return {"name": wf.metadata.name}
+
+    def _expand_items(self, data):
+        """Turn the POST body into a list of individual workflow bodies.
+        """
+        ue = falcon.HTTPUnprocessableEntity
+        if type(data) is not dict:
+            raise ue(description="Batch body must be a JSON object!")
+        if "items" in data:
+            items = data["items"]
+            if type(items) is not list or not items:
+                raise ue(description="'items' must be a non-empty list!")
+        elif "template" in data:
+            items = self._expand_template(
+                data["template"], data.get("parameters") or {}
+            )
+        else:
+            raise ue(description="One of 'items' or 'template' required!")
+        if len(items) > MAX_BATCH:
+            raise ue(
+                description="At most {} workflows per batch!".format(MAX_BATCH)
+            )
+        for idx, item in enumerate(items):
+            if type(item) is not dict:
+                raise ue(description="Item {} is not an object!".format(idx))
+        return items
+
+    def _expand_template(self, template, parameters):
+        ue = falcon.HTTPUnprocessableEntity
+        if type(template) is not dict:
+            raise ue(description="'template' must be an object!")
+        if type(parameters) is not dict:
+            raise ue(description="'parameters' must be an object!")
+        keys = sorted(parameters.keys())
+        for key in keys:
+            if type(parameters[key]) is not list or not parameters[key]:
+                raise ue(
+                    description="Parameter '{}' must be a non-empty "
+                    "list!".format(key)
+                )
+        count = 1
+        for key in keys:
+            count *= len(parameters[key])
+        if count > MAX_BATCH:
+            raise ue(
+                description="At most {} workflows per batch!".format(MAX_BATCH)
+            )
+        items = []
+        for combo in itertools.product(*[parameters[k] for k in keys]):
+            subs = {k: str(v) for k, v in zip(keys, combo)}
+            item = json.loads(json.dumps(template))
+            cmd = item.get("command")
+            if type(cmd) is list:
+                item["command"] = [_substitute(tok, subs) for tok in cmd]
+            if "name" in item:
+                item["name"] = _substitute(item["name"], subs)
+            items.append(item)
+        return items
+
+
+def _substitute(val, subs):
+    if type(val) is not str:
+        return val
+    return string.Template(val).safe_substitute(subs)
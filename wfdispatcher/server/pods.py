@@ -1,19 +1,29 @@
-from eliot import log_call
+from ..objects.actionlog import log_call
 from falcon import HTTPNotFound
 from rubin_jupyter_utils.hub import LoggableChild
+from ..helpers.not_modified import not_modified
+from ..helpers.resource_version import resource_version
+from ..helpers.set_media import set_media
+from ..helpers.want_live_read import want_live_read
 
 
 class Pods(LoggableChild):
     @log_call
     def on_get(self, req, resp, wf_id):
+        set_media(resp, self.get_pods(req, resp, wf_id))
+
+    def get_pods(self, req, resp, wf_id):
         self.log.debug("Determining pods in workflow '{}'".format(wf_id))
-        wf = self.parent.rubin_mgr.workflow_mgr.get_workflow(wf_id)
+        rm = self.parent.make_workflow_manager(req)
+        wf = rm.get_workflow(wf_id, live=want_live_read(req))
         if not wf:
             raise HTTPNotFound()
-        nd = wf.status.nodes
+        nd = wf.get("status", {}).get("nodes")
         if not nd:
             raise HTTPNotFound()
+        if not_modified(req, resp, resource_version(wf)):
+            return None
         rv = []
         for k in nd:
             rv.append({"name": k})
-        resp.media = rv
+        return rv
@@ -0,0 +1,96 @@
+import math
+import threading
+import time
+import falcon
+from .releasingstream import release_after_response
+
+READ = "read"
+SUBMIT = "submit"
+STREAM = "stream"
+STREAM_SUFFIXES = ("/logs", "/watch")
+
+
+class RateLimitMiddleware(object):
+    """Limit each authenticated user's request rate and concurrency.
+
+    Requests are classed as 'submit' (POST), 'stream' (logs and watch)
+    or 'read' (everything else), and each user has a token bucket per
+    class, refilled at 'rates'[class] tokens per second up to
+    'bursts'[class] (by default, twice the rate).  A user may also have
+    no more than 'max_in_flight' requests (including response streams)
+    outstanding at once.  Requests over either limit get 429 Too Many
+    Requests with Retry-After.
+
+    This must come after the authenticator in the middleware chain.
+    The buckets are updated without locking, so under heavy concurrency
+    a user may occasionally get a request or two more than their budget;
+    the in-flight limit uses an uncontended per-user semaphore.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.rates = {READ: 20.0, SUBMIT: 2.0, STREAM: 1.0}
+        self.rates.update(kwargs.pop("rates", {}))
+        self.bursts = {k: max(2 * v, 1.0) for k, v in self.rates.items()}
+        self.bursts.update(kwargs.pop("bursts", {}))
+        self.max_in_flight = kwargs.pop("max_in_flight", 16)
+        self.exempt_paths = kwargs.pop("exempt_paths", [])
+        self._buckets = {}
+        self._in_flight = {}
+
+    def classify(self, req):
+        if req.method == "POST":
+            return SUBMIT
+        if req.path.rstrip("/").endswith(STREAM_SUFFIXES):
+            return STREAM
+        return READ
+
+    def _take(self, user, cls):
+        """Take a token from the user's bucket for the class.  Return 0 on
+        success, or the seconds until a token will be available.
+        """
+        now = time.monotonic()
+        rate = self.rates[cls]
+        burst = self.bursts[cls]
+        bucket = self._buckets.get((user, cls))
+        if bucket is None:
+            bucket = self._buckets.setdefault((user, cls), [burst, now])
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0
+        bucket[0] = tokens
+        return (1 - tokens) / rate
+
+    def process_request(self, req, resp):
+        if req.path in self.exempt_paths:
+            return
+        user = req.context.get("user")
+        if not user:
+            return
+        name = user.name
+        wait = self._take(name, self.classify(req))
+        if wait:
+            raise falcon.HTTPTooManyRequests(
+                description="Request rate limit exceeded.",
+                retry_after=max(1, math.ceil(wait)),
+            )
+        sem = self._in_flight.get(name)
+        if sem is None:
+            sem = self._in_flight.setdefault(
+                name, threading.BoundedSemaphore(self.max_in_flight)
+            )
+        if not sem.acquire(blocking=False):
+            raise falcon.HTTPTooManyRequests(
+                description="Too many concurrent requests.", retry_after=1
+            )
+        req.context.rate_limit_sem = sem
+
+    def process_response(self, req, resp, resource, req_succeeded):
+        sem = req.context.get("rate_limit_sem")
+        if sem is None:
+            return
+        req.context.rate_limit_sem = None
+        # A streamed body is sent after we return; hold the slot until it
+        #  has been.
+        release_after_response(resp, sem.release)
@@ -0,0 +1,84 @@
+import inspect
+
+
+def release_after_response(resp, release):
+    """Call 'release' when the response has been sent: at once if it has
+    no streamed body, or else when its stream is exhausted or closed.
+    This is for middleware process_response() hooks, which run before a
+    streamed body is sent.
+    """
+    stream = resp.stream
+    if stream is not None and hasattr(stream, "__aiter__"):
+        resp.stream = AsyncReleasingStream(stream, release)
+    elif stream is not None and hasattr(stream, "__iter__"):
+        resp.stream = ReleasingStream(stream, release)
+    else:
+        release()
+
+
+class ReleasingStream(object):
+    """Wrap a response stream so that 'release' is called, once, when it
+    is exhausted or closed, whichever comes first.  The server closes
+    the stream even if it was never iterated over (e.g. when the client
+    went away first), so the call cannot be missed.
+    """
+
+    def __init__(self, stream, release):
+        self.stream = stream
+        self._iter = None
+        self._release_fn = release
+
+    def _release(self):
+        release, self._release_fn = self._release_fn, None
+        if release is not None:
+            release()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._iter is None:
+            self._iter = iter(self.stream)
+        try:
+            return next(self._iter)
+        except StopIteration:
+            self._release()
+            raise
+
+    def close(self):
+        try:
+            close = getattr(self.stream, "close", None)
+            if close:
+                close()
+        finally:
+            self._release()
+
+
+class AsyncReleasingStream(ReleasingStream):
+    """ReleasingStream for an asynchronous response stream; Falcon
+    awaits close().
+    """
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._iter is None:
+            self._iter = self.stream.__aiter__()
+        try:
+            return await self._iter.__anext__()
+        except StopAsyncIteration:
+            self._release()
+            raise
+
+    async def close(self):
+        try:
+            close = getattr(self.stream, "close", None)
+            if close is None:
+                close = getattr(self.stream, "aclose", None)
+            if close:
+                res = close()
+                if inspect.isawaitable(res):
+                    await res
+        finally:
+            self._release()
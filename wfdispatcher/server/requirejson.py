@@ -1,19 +1,28 @@
 import falcon
-from eliot import start_action
+from ..objects.actionlog import start_action
 
 
 class RequireJSONMiddleware(object):
+    def __init__(self, exempt_paths=None):
+        self.exempt_paths = exempt_paths or []
+
     def process_request(self, req, resp):
+        if req.path in self.exempt_paths:
+            return
         with start_action(action_type="process_request/requireJSON"):
             if not req.client_accepts_json:
                 raise falcon.HTTPNotAcceptable(
-                    "This API only supports responses encoded as JSON.",
+                    description=(
+                        "This API only supports responses encoded as JSON."
+                    ),
                     href="http://docs.examples.com/api/json",
                 )
 
             if req.method in ("POST", "PUT"):
                 if "application/json" not in req.content_type:
                     raise falcon.HTTPUnsupportedMediaType(
-                        "This API only supports requests encoded as JSON.",
+                        description=(
+                            "This API only supports requests encoded as JSON."
+                        ),
                         href="http://docs.examples.com/api/json",
                     )
@@ -4,14 +4,32 @@
 import falcon
 from ..auth.auth import AuthenticatorMiddleware as AM
 from ..helpers.mockspawner import MockSpawner
+from ..objects.actionlog import POLICY
+from ..objects.clientpool import KubernetesClientPool
+from ..objects.configmapcache import ConfigMapCache
+from ..objects.configsnapshot import ConfigSnapshot
+from ..objects.manifestcache import ManifestCache
+from ..objects.metrics import CACHES
+from ..objects.namespacecache import NamespaceCache
+from ..objects.provisioncache import ProvisionCache
+from ..objects.summarycache import SummaryCache
+from ..objects.submissionqueue import SubmissionQueue
+from ..objects.workflowcache import WorkflowCache
+from ..objects.workflowmanager import RubinWorkflowManager
+from .metrics import Metrics, MetricsMiddleware, METRICS_PATH
+from .ratelimit import RateLimitMiddleware
 from .requirejson import RequireJSONMiddleware
+from .command import Command
 from .new import New
+from .newbatch import NewBatch
 from .details import Details
 from .list import List
 from .logs import Logs
 from .pods import Pods
 from .singleworkflow import SingleWorkflow
+from .submission import Submission
 from .version import Version
+from .watch import Watch
 from rubin_jupyter_utils.hub import Loggable
 
 
@@ -23,19 +41,119 @@ class Server(Loggable):
         self._mock = _mock
         if _mock:
             self.log.warning("Running with auth mocking enabled.")
+        POLICY.configure(
+            mode=kwargs.pop("log_mode", "full"),
+            sample_rate=kwargs.pop("action_sample_rate", 1.0),
+            rates=kwargs.pop("action_rates", None),
+        )
         self.spawner = MockSpawner(parent=self)
-        self.authenticator = AM(parent=self)
-        self.app = falcon.API(
-            middleware=[self.authenticator, RequireJSONMiddleware()]
+        self.client_pool = KubernetesClientPool(
+            parent=self,
+            pool_maxsize=kwargs.pop("api_pool_size", 32),
+            kube_config=kwargs.pop("kube_config", None),
+        )
+        self.config_snapshot = ConfigSnapshot(
+            parent=self, config_overrides=kwargs.pop("config_overrides", None)
+        )
+        self.ns_cache = NamespaceCache(
+            parent=self, client_pool=self.client_pool
         )
-        ver = Version()
-        ll = List(parent=self)
-        single = SingleWorkflow(parent=self)
-        pods = Pods(parent=self)
-        logs = Logs(parent=self)
-        new = New(parent=self)
-        details = Details(parent=self)
+        self.manifest_cache = ManifestCache()
+        self.summary_cache = SummaryCache()
+        self.provision_cache = None
+        provision_ttl = kwargs.pop("provision_ttl", 300)
+        if provision_ttl:
+            self.provision_cache = ProvisionCache(ttl=provision_ttl)
+        self.configmap_cache = ConfigMapCache(
+            parent=self,
+            client_pool=self.client_pool,
+            ttl=kwargs.pop("configmap_ttl", 300),
+            gc_interval=kwargs.pop("configmap_gc_interval", 0),
+        )
+        self.configmap_cache.start()
+        self.submission_queue = None
+        if kwargs.pop("submission_queue", False):
+            self.log.info("Queueing workflow submissions.")
+            self.submission_queue = SubmissionQueue(
+                parent=self,
+                maxsize=kwargs.pop("submission_queue_size", 1000),
+                workers=kwargs.pop("submission_workers", 8),
+                rate=kwargs.pop("submission_rate", 10),
+            )
+            self.submission_queue.start()
+        self.wf_cache = None
+        if kwargs.pop("workflow_cache", False):
+            self.log.info("Serving workflow reads from watch cache.")
+            self.wf_cache = WorkflowCache(
+                parent=self, client_pool=self.client_pool
+            )
+            self.wf_cache.start()
+        self.authenticator = AM(
+            parent=self, _mock=_mock, exempt_paths=[METRICS_PATH]
+        )
+        CACHES.track("claims", self.authenticator.claims_cache)
+        CACHES.track("namespace", self.ns_cache)
+        CACHES.track("manifest", self.manifest_cache)
+        CACHES.track("summary", self.summary_cache)
+        CACHES.track("configmap", self.configmap_cache)
+        if self.provision_cache:
+            CACHES.track("provision", self.provision_cache)
+        self.rate_limiter = None
+        rate_limit = kwargs.pop("rate_limit", None)
+        if rate_limit is not None:
+            self.log.info("Rate limiting requests per user.")
+            self.rate_limiter = RateLimitMiddleware(
+                exempt_paths=[METRICS_PATH], **rate_limit
+            )
         self.workflows = {}
+        self.app = self.create_app()
+        self.add_routes()
+
+    def create_app(self):
+        return falcon.App(middleware=self.create_middleware())
+
+    def create_middleware(self):
+        """Return the middleware chain, in order.
+        """
+        mw = [MetricsMiddleware(), self.authenticator]
+        if self.rate_limiter:
+            mw.append(self.rate_limiter)
+        mw.append(RequireJSONMiddleware(exempt_paths=[METRICS_PATH]))
+        return mw
+
+    def create_resources(self):
+        """Return the route resources, keyed by name.  A subclass serving
+        a different kind of app overrides this.
+        """
+        return {
+            "version": Version(),
+            "list": List(parent=self),
+            "single": SingleWorkflow(parent=self),
+            "pods": Pods(parent=self),
+            "logs": Logs(parent=self),
+            "new": New(parent=self),
+            "newbatch": NewBatch(parent=self),
+            "details": Details(parent=self),
+            "watch": Watch(parent=self),
+            "command": Command(parent=self),
+            "metrics": Metrics(),
+            "submission": Submission(parent=self),
+        }
+
+    def add_routes(self):
+        res = self.create_resources()
+        ver = res["version"]
+        ll = res["list"]
+        single = res["single"]
+        pods = res["pods"]
+        logs = res["logs"]
+        new = res["new"]
+        newbatch = res["newbatch"]
+        details = res["details"]
+        watch = res["watch"]
+        command = res["command"]
+        metrics = res["metrics"]
+        submission = res["submission"]
         self.app.add_route("/", ll)
         self.app.add_route("/workflow", ll)
         self.app.add_route("/workflow/", ll)
@@ -43,9 +161,29 @@ class Server(Loggable):
         self.app.add_route("/workflows/", ll)
         self.app.add_route("/version", ver)
         self.app.add_route("/version/", ver)
+        self.app.add_route(METRICS_PATH, metrics)
         self.app.add_route("/new", new)
         self.app.add_route("/new/", new)
+        self.app.add_route("/new/batch", newbatch)
+        self.app.add_route("/submission/{sub_id}", submission)
         self.app.add_route("/workflow/{wf_id}", single)
         self.app.add_route("/workflow/{wf_id}/pods", pods)
         self.app.add_route("/workflow/{wf_id}/logs", logs)
+        self.app.add_route("/workflow/{wf_id}/watch", watch)
+        self.app.add_route("/workflow/{wf_id}/command", command)
         self.app.add_route("/workflow/{wf_id}/details/{pod_id}", details)
+
+    def make_workflow_manager(self, req):
+        """Return a per-request workflow manager that borrows the
+        server's shared API clients.
+        """
+        return RubinWorkflowManager(
+            req=req,
+            client_pool=self.client_pool,
+            wf_cache=self.wf_cache,
+            ns_cache=self.ns_cache,
+            config_snapshot=self.config_snapshot,
+            manifest_cache=self.manifest_cache,
+            configmap_cache=self.configmap_cache,
+            provision_cache=self.provision_cache,
+        )
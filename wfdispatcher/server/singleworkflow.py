@@ -1,24 +1,78 @@
-from eliot import log_call
-from falcon import HTTPNotFound
+import json
+import falcon
+from ..objects.actionlog import log_call
+from falcon import HTTPInvalidParam, HTTPNotFound
 from rubin_jupyter_utils.hub import LoggableChild
-from ..helpers.sanitize import sanitize
-from ..objects.workflowmanager import RubinWorkflowManager
+from ..helpers.not_modified import not_modified
+from ..helpers.resource_version import resource_version
+from ..helpers.set_media import set_media
+from ..helpers.want_live_read import want_live_read
 
 
 class SingleWorkflow(LoggableChild):
     @log_call
     def on_get(self, req, resp, wf_id):
+        """Return a summary of the workflow: its name, phase, timings,
+        node counts by phase and failed nodes.  With 'view=full', return
+        the whole workflow object instead.
+
+        The response's ETag follows the workflow's resourceVersion, and a
+        request whose If-None-Match names it gets a 304 Not Modified.
+        """
+        if self.want_full_view(req):
+            self.set_wf_data(resp, self.get_wf_data(req, resp, wf_id))
+            return
+        set_media(resp, self.get_wf_summary(req, resp, wf_id))
+
+    @log_call
+    def on_delete(self, req, resp, wf_id):
+        resp.media = self.delete_wf(req, wf_id)
+
+    def get_wf(self, req, wf_id):
         self.log.debug("Getting workflow '{}'".format(wf_id))
-        rm = RubinWorkflowManager(req=req)
-        wf = rm.get_workflow(wf_id)
+        rm = self.parent.make_workflow_manager(req)
+        wf = rm.get_workflow(wf_id, live=want_live_read(req))
         if not wf:
             raise HTTPNotFound()
-        resp.media = sanitize(wf)
+        return wf
 
-    @log_call
-    def on_delete(self, req, resp, wf_id):
+    def set_wf_data(self, resp, data):
+        # A 304 must not carry a Content-Type.
+        if data is not None:
+            resp.content_type = falcon.MEDIA_JSON
+            resp.data = data
+
+    def want_full_view(self, req):
+        view = req.get_param("view", default="summary")
+        if view not in ("summary", "full"):
+            raise HTTPInvalidParam("must be 'summary' or 'full'", "view")
+        return view == "full"
+
+    def get_wf_summary(self, req, resp, wf_id):
+        wf = self.get_wf(req, wf_id)
+        if not_modified(req, resp, resource_version(wf)):
+            return None
+        return self.parent.summary_cache.summarize(wf)
+
+    def get_wf_data(self, req, resp, wf_id):
+        """Return the workflow as JSON bytes, or None if the client's copy
+        is current.  A live read passes the API server's response straight
+        through without parsing it.
+        """
+        rm = self.parent.make_workflow_manager(req)
+        self.log.debug("Getting workflow '{}'".format(wf_id))
+        wf = rm.get_workflow_document(wf_id, live=want_live_read(req))
+        if wf is None:
+            raise HTTPNotFound()
+        if not_modified(req, resp, resource_version(wf)):
+            return None
+        if isinstance(wf, bytes):
+            return wf
+        return json.dumps(wf).encode("utf-8")
+
+    def delete_wf(self, req, wf_id):
         self.log.debug("Deleting workflow '{}'".format(wf_id))
-        rm = RubinWorkflowManager(req=req)
+        rm = self.parent.make_workflow_manager(req)
         wf = rm.delete_workflow(wf_id)
         if not wf:
             raise HTTPNotFound()
@@ -26,4 +80,4 @@ class SingleWorkflow(LoggableChild):
         rv = {"status": status}
         if status == "Success":
             rv["name"] = wf["details"]["name"]
-        resp.media = rv
+        return rv
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 import argparse
+import json
+import os
 from wsgiserver import WSGIServer
 from .server import Server
 
@@ -33,6 +35,149 @@ def standalone():
         action="store_true",
         help="Do not verify JWT audience",
     )
+    parser.add_argument(
+        "--api-pool-size",
+        help=(
+            "Connection pool size for Kubernetes/Argo API clients "
+            + "(default: 32, or --io-threads plus --stream-threads "
+            + "with --asgi)"
+        ),
+        type=int,
+    )
+    parser.add_argument(
+        "--workflow-cache",
+        action="store_true",
+        help="Serve workflow reads from a watch-maintained cache",
+    )
+    parser.add_argument(
+        "--submission-queue",
+        action="store_true",
+        help="Queue workflow submissions and answer /new with a ticket",
+    )
+    parser.add_argument(
+        "--submission-workers",
+        help="Threads submitting queued workflows",
+        type=int,
+        default=8,
+    )
+    parser.add_argument(
+        "--submission-rate",
+        help="Maximum queued submissions started per second",
+        type=float,
+        default=10,
+    )
+    parser.add_argument(
+        "--submission-queue-size",
+        help="Maximum submissions waiting in the queue",
+        type=int,
+        default=1000,
+    )
+    parser.add_argument(
+        "--rate-limit",
+        action="store_true",
+        help="Limit each user's request rate and concurrency",
+    )
+    for cls, rate in [("read", 20), ("submit", 2), ("stream", 1)]:
+        parser.add_argument(
+            "--{}-rate".format(cls),
+            help=(
+                "With --rate-limit, {} requests per second ".format(cls)
+                + "per user (bursts of twice that are allowed)"
+            ),
+            type=float,
+            default=rate,
+        )
+    parser.add_argument(
+        "--max-in-flight",
+        help="With --rate-limit, concurrent requests per user",
+        type=int,
+        default=16,
+    )
+    parser.add_argument(
+        "--provision-ttl",
+        help=(
+            "Seconds to skip reprovisioning a user's namespace after "
+            + "provisioning it (0 disables)"
+        ),
+        type=int,
+        default=300,
+    )
+    parser.add_argument(
+        "--configmap-ttl",
+        help=(
+            "Seconds to skip recreating a command configmap after "
+            + "creating or reusing it"
+        ),
+        type=int,
+        default=300,
+    )
+    parser.add_argument(
+        "--configmap-gc-interval",
+        help=(
+            "Seconds between sweeps for unused command configmaps "
+            + "(default 0: disabled)"
+        ),
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--log-mode",
+        choices=["full", "lean", "off"],
+        default="full",
+        help=(
+            "Eliot action logging: 'full', 'lean' (no arguments, "
+            + "results or fields), or 'off'"
+        ),
+    )
+    parser.add_argument(
+        "--action-sample-rate",
+        help="Fraction of top-level eliot actions (tasks) to log",
+        type=float,
+        default=1.0,
+    )
+    parser.add_argument(
+        "--action-rate",
+        action="append",
+        default=[],
+        metavar="ACTION_TYPE=RATE",
+        help="Sample rate for one action type (may be repeated)",
+    )
+    parser.add_argument(
+        "-t",
+        "--threads",
+        help="Number of WSGI worker threads",
+        type=int,
+        default=10,
+    )
+    parser.add_argument(
+        "--asgi",
+        action="store_true",
+        help="Serve an asyncio (ASGI) app with uvicorn instead of WSGI",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="Number of ASGI worker processes",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--io-threads",
+        help="Threads per ASGI worker for Kubernetes/Argo calls",
+        type=int,
+        default=32,
+    )
+    parser.add_argument(
+        "--stream-threads",
+        help="Threads per ASGI worker for reading log and watch streams",
+        type=int,
+        default=64,
+    )
+    parser.add_argument(
+        "--concurrency",
+        help="Maximum concurrent connections per ASGI worker",
+        type=int,
+    )
     args = parser.parse_args()
     mock = args.mock
     v_s = True
@@ -41,10 +186,79 @@ def standalone():
         v_s = False
     if args.no_verify_audience:
         v_a = False
-    server = Server(_mock=mock, verify_signature=v_s, verify_audience=v_a)
-    httpd = WSGIServer(server.app, host=args.bind_address, port=args.port)
+    options = {
+        "_mock": mock,
+        "verify_signature": v_s,
+        "verify_audience": v_a,
+        "workflow_cache": args.workflow_cache,
+        "provision_ttl": args.provision_ttl,
+        "configmap_ttl": args.configmap_ttl,
+        "configmap_gc_interval": args.configmap_gc_interval,
+        "submission_queue": args.submission_queue,
+        "submission_workers": args.submission_workers,
+        "submission_rate": args.submission_rate,
+        "submission_queue_size": args.submission_queue_size,
+        "log_mode": args.log_mode,
+        "action_sample_rate": args.action_sample_rate,
+        "action_rates": parse_rates(args.action_rate),
+    }
+    if args.rate_limit:
+        rates = {
+            "read": args.read_rate,
+            "submit": args.submit_rate,
+            "stream": args.stream_rate,
+        }
+        options["rate_limit"] = {
+            "rates": rates,
+            "max_in_flight": args.max_in_flight,
+        }
+    if args.api_pool_size:
+        options["api_pool_size"] = args.api_pool_size
+    if args.asgi:
+        run_asgi(args, options)
+        return
+    server = Server(**options)
+    httpd = WSGIServer(
+        server.app,
+        host=args.bind_address,
+        port=args.port,
+        numthreads=args.threads,
+    )
     httpd.start()
 
 
+def parse_rates(specs):
+    rates = {}
+    for spec in specs:
+        action_type, _, rate = spec.rpartition("=")
+        if not action_type:
+            raise ValueError("Action rate '{}' not TYPE=RATE".format(spec))
+        rates[action_type] = float(rate)
+    return rates
+
+
+def run_asgi(args, options):
+    try:
+        import uvicorn
+    except ImportError:
+        raise RuntimeError(
+            "ASGI mode requires uvicorn: pip install 'wfdispatcher[asgi]'"
+        )
+    from .aio.server import OPTIONS_ENV_VAR
+
+    options["io_threads"] = args.io_threads
+    options["stream_threads"] = args.stream_threads
+    # Each worker process builds its own server from these options.
+    os.environ[OPTIONS_ENV_VAR] = json.dumps(options)
+    uvicorn.run(
+        "wfdispatcher.server.aio.server:make_asgi_app",
+        factory=True,
+        host=args.bind_address,
+        port=args.port,
+        workers=args.workers,
+        limit_concurrency=args.concurrency,
+    )
+
+
 if __name__ == "__main__":
     standalone()
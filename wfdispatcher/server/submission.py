@@ -0,0 +1,25 @@
+from ..objects.actionlog import log_call
+from falcon import HTTPNotFound
+from rubin_jupyter_utils.hub import LoggableChild
+
+
+class Submission(LoggableChild):
+    @log_call
+    def on_get(self, req, resp, sub_id):
+        """Report on a queued submission: its 'state' ('queued', 'running',
+        'succeeded' or 'failed'), timestamps, and the workflow 'name' or
+        the 'error'.
+        """
+        resp.media = self.get_submission(req, sub_id)
+
+    def get_submission(self, req, sub_id):
+        queue = self.parent.submission_queue
+        if not queue:
+            raise HTTPNotFound()
+        ticket = queue.store.get(sub_id)
+        # Other users' submissions are none of this user's business.
+        user = req.context.get("user")
+        if not ticket or not user or ticket["user"] != user.name:
+            raise HTTPNotFound()
+        del ticket["user"]
+        return ticket
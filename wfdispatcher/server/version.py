@@ -1,5 +1,5 @@
 import falcon
-from eliot import log_call
+from ..objects.actionlog import log_call
 from .._version import __version__
 from rubin_jupyter_utils.hub import Loggable
 
@@ -0,0 +1,73 @@
+from ..objects.actionlog import log_call
+from falcon import HTTPNotFound
+from rubin_jupyter_utils.hub import LoggableChild
+from ..helpers.get_param_as_csv import get_param_as_csv
+from ..helpers.want_live_read import want_live_read
+from ..helpers.workflow_delta import TERMINAL_PHASES
+from .logs import NDJSON, ndjson_lines
+
+
+class Watch(LoggableChild):
+    @log_call
+    def on_get(self, req, resp, wf_id):
+        """Report workflow status changes without polling.
+
+        By default the response is newline-delimited JSON: one event with
+        the current phase and node states, then one per change, until
+        the workflow finishes, is deleted, or 'timeout' (seconds, default
+        60, maximum 600) passes.
+
+        With 'wait=<phase>[,<phase>...]' (or 'wait=completed' for any
+        terminal phase) this is a long poll instead: a single JSON
+        document with the workflow's state is returned as soon as it
+        reaches one of those phases (or finishes, since it will not change
+        after that), or at the timeout, in which case "timedOut" is true.
+        """
+        wait, timeout = self.get_watch_opts(req)
+        if wait:
+            resp.media = self.wait_for(req, wf_id, wait, timeout)
+            return
+        resp.content_type = NDJSON
+        resp.stream = ndjson_lines(self.watch(req, wf_id, timeout))
+
+    def get_watch_opts(self, req):
+        timeout = req.get_param_as_int(
+            "timeout", min_value=1, max_value=600, default=60
+        )
+        wait = get_param_as_csv(req, "wait")
+        if wait and "completed" in wait:
+            wait = list(set(wait + TERMINAL_PHASES))
+        return wait, timeout
+
+    def watch(self, req, wf_id, timeout):
+        """Resolve the workflow (raising HTTPNotFound before we start
+        streaming) and return a generator over its status events.
+        """
+        self.log.debug("Watching workflow '{}'".format(wf_id))
+        rm = self.parent.make_workflow_manager(req)
+        wf = rm.get_workflow(wf_id, live=want_live_read(req))
+        if not wf:
+            raise HTTPNotFound()
+        return rm.watch_workflow(wf, timeout=timeout)
+
+    def wait_for(self, req, wf_id, phases, timeout):
+        self.log.debug(
+            "Waiting up to {}s for workflow '{}' to reach '{}'".format(
+                timeout, wf_id, phases
+            )
+        )
+        state = {"name": wf_id, "timedOut": True}
+        for event in self.watch(req, wf_id, timeout):
+            nodes = state.get("nodes", {})
+            nodes.update(event.get("nodes", {}))
+            state.update(event)
+            state["nodes"] = nodes
+            phase = event["phase"]
+            if (
+                event.get("deleted")
+                or phase in phases
+                or phase in TERMINAL_PHASES
+            ):
+                state["timedOut"] = False
+                break
+        return state